@@ -0,0 +1,54 @@
+import threading
+
+
+class GroupAggregator:
+    """
+    Running performance rollups for named groups of symbols (sectors, industries).
+    Each group keeps sums of its constituents' percent change and volume, so a
+    changed quote only adjusts the groups it belongs to instead of recomputing
+    every group from scratch.
+    """
+
+    def __init__(self, groups: dict):
+        self._lock = threading.Lock()
+        self._members = {}  # symbol -> names of the groups containing it
+        self._contributions = {}  # symbol -> (percent_change, volume)
+        self._totals = {name: {'change': 0.0, 'volume': 0.0, 'stocks': 0} for name in groups}
+        for name, symbols in groups.items():
+            for symbol in symbols:
+                self._members.setdefault(symbol, []).append(name)
+
+    @property
+    def symbols(self) -> list:
+        """Every symbol tracked by at least one group"""
+        return list(self._members)
+
+    def update(self, symbol: str, percent_change: float, volume: float):
+        """Apply the latest quote for a symbol to each group containing it"""
+        groups = self._members.get(symbol)
+        if not groups:
+            return
+        with self._lock:
+            previous = self._contributions.get(symbol)
+            self._contributions[symbol] = (percent_change, volume)
+            for name in groups:
+                totals = self._totals[name]
+                if previous:
+                    totals['change'] -= previous[0]
+                    totals['volume'] -= previous[1]
+                else:
+                    totals['stocks'] += 1
+                totals['change'] += percent_change
+                totals['volume'] += volume
+
+    def snapshot(self) -> dict:
+        """Average change, total volume and constituent count for every group with data"""
+        with self._lock:
+            return {
+                name: {
+                    'change': totals['change'] / totals['stocks'],
+                    'volume': totals['volume'],
+                    'stocks': totals['stocks']
+                }
+                for name, totals in self._totals.items() if totals['stocks']
+            }
@@ -1,7 +1,7 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-import yfinance as yf
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+from __future__ import annotations
+
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context, g
+from markupsafe import Markup
 from datetime import datetime
 import time
 from datetime import time as datetime_time
@@ -9,11 +9,36 @@ from typing import Optional
 import pytz
 import threading
 import logging
+import json
+import re
+import atexit
+import os
+import hashlib
 from config import Config
+from lazy import LazyModule
+from aggregates import GroupAggregator
+from models import Quote, format_large_number
+from cache import TTLCache, SingleFlight
+from history_store import HistoryStore
+from indicators import IndicatorCache
+from downsample import lttb, ohlc_buckets
+from streaming import QuoteBroker
+from symbol_index import load_symbol_index
+from scheduler import Backfill, RefreshScheduler, last_market_close, seconds_until_market_open
+from providers import create_provider, InstrumentedProvider
+from fetch_engine import FetchEngine
+from shared_cache import FundamentalsSnapshot, SharedQuoteStore
+from screening import ScreenTable, ScreenError
+from metrics import Registry
+
+# pandas/numpy (and yfinance, in the provider) load on first use rather than at
+# import, so a new worker is up and serving cached pages before they are needed
+pd = LazyModule('pandas')
+np = LazyModule('numpy')
 
 # Configure logging
 logging.basicConfig(
-    filename='app.log',
+    filename=os.path.join(Config.BASE_DIR, 'app.log'),
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
@@ -26,7 +51,129 @@ INDUSTRIES = Config.INDUSTRIES
 DEFAULT_STOCKS = Config.DEFAULT_STOCKS
 MAX_WATCHLIST_ITEMS = Config.MAX_WATCHLIST_ITEMS
 
-stock_cache = {}
+# Exposed on /metrics in the Prometheus text format
+metrics = Registry()
+upstream_latency = metrics.histogram('lovestock_upstream_seconds', 'Upstream market data call latency', ['call'])
+upstream_errors = metrics.counter('lovestock_upstream_errors_total', 'Failed upstream market data calls', ['call'])
+route_latency = metrics.histogram('lovestock_request_seconds', 'Request latency by route', ['route', 'method'])
+route_requests = metrics.counter('lovestock_requests_total', 'Requests by route and status', ['route', 'status'])
+quote_cache_lookups = metrics.counter('lovestock_quote_cache_lookups_total',
+                                      'Quote API cache lookups by result', ['result'])
+refresh_duration = metrics.histogram('lovestock_refresh_pass_seconds', 'Duration of background refresh passes')
+history_latency = metrics.histogram('lovestock_history_load_seconds',
+                                    'Bar store load latency by source: cold (full download), '
+                                    'tail (incremental fetch) or warm (local only)', ['source'])
+
+def observe_upstream(call: str, seconds: float, ok: bool):
+    upstream_latency.observe(seconds, call=call)
+    if not ok:
+        upstream_errors.inc(call=call)
+
+def observe_history(source: str, seconds: float):
+    history_latency.observe(seconds, source=source)
+
+# All upstream market data goes through this provider (yfinance, or offline replay)
+provider = InstrumentedProvider(
+    create_provider(Config.DATA_PROVIDER, latency=Config.REPLAY_LATENCY, record_dir=Config.RECORD_DIR,
+                    max_threads=Config.FETCH_CONCURRENCY),
+    observe_upstream
+)
+fetch_engine = FetchEngine(max_concurrency=Config.FETCH_CONCURRENCY)  # Shared by every upstream fan-out
+
+stock_cache = {}  # This worker's replica of the shared quote cache
+quote_versions = {}  # symbol -> bumped whenever its quote's content changes; keys rendered-page caches
+stale_symbols = set()  # Symbols whose cached quote was already stale when it arrived (e.g. restored at boot)
+quote_versions_lock = threading.Lock()  # Guards quote_versions and stale_symbols updates
+quote_payloads = {}  # symbol -> (quote, ETag, JSON body) for /api/stock/<symbol>/latest
+page_fragments = TTLCache(maxsize=Config.PAGE_CACHE_SIZE, ttl=Config.PAGE_CACHE_TTL)
+refresh_stats = {}  # Outcome of the last background refresh pass
+shared_quotes = SharedQuoteStore(Config.SHARED_CACHE_PATH, lease_ttl=Config.REFRESH_LEASE_TTL)
+# Shared cache version already applied to stock_cache, whether this worker holds
+# the refresher lease, and when it last read other workers' demand
+shared_sync = {'version': 0, 'leader': False, 'demand_seen': 0.0}
+shared_sync_lock = threading.Lock()
+quote_broker = QuoteBroker()  # Pushes changed quotes to /api/stream clients
+sector_aggregates = GroupAggregator(SECTORS)
+industry_aggregates = GroupAggregator(INDUSTRIES)
+# Every sector/industry constituent, once each (e.g. MSFT is in Software and Cloud Computing)
+SCREENER_SYMBOLS = list(dict.fromkeys(sector_aggregates.symbols + industry_aggregates.symbols))
+
+# Decides what the background refresher fetches: the dashboard stays hot, screener
+# constituents refresh slowly, anything users request joins until demand fades
+refresh_scheduler = RefreshScheduler(hot_interval=Config.CACHE_REFRESH_INTERVAL,
+                                     cold_interval=Config.COLD_REFRESH_INTERVAL,
+                                     hot_window=Config.DEMAND_HOT_WINDOW,
+                                     expire_after=Config.DEMAND_EXPIRY,
+                                     max_failures=Config.REFRESH_MAX_FAILURES)
+refresh_scheduler.pin(DEFAULT_STOCKS)
+refresh_scheduler.pin(SCREENER_SYMBOLS, hot=False)
+
+# Search answers from this index; only the top hits get live quotes
+symbol_index = load_symbol_index(Config.TICKER_LIST, DEFAULT_STOCKS + SCREENER_SYMBOLS)
+TICKER_PATTERN = re.compile(r'^[A-Z0-9^.=-]{1,10}$')
+
+# Every listed stock (not the ^ indices) can be screened; the refresher keeps all
+# their quotes current, and fills in missing fundamentals a few symbols per pass
+SCREEN_UNIVERSE = [symbol for symbol in symbol_index.symbols if not symbol.startswith('^')]
+refresh_scheduler.pin(SCREEN_UNIVERSE, hot=False)
+# Tracked only for screening: their fundamentals come from backfill_screen_fundamentals()
+SCREEN_ONLY_SYMBOLS = frozenset(SCREEN_UNIVERSE) - set(DEFAULT_STOCKS) - set(SCREENER_SYMBOLS)
+
+# stock.info is the slowest upstream call and barely changes within a day,
+# so only the fields we use are kept, separately from the 5-second price cache
+FUNDAMENTAL_FIELDS = ('longName', 'marketCap', 'forwardPE', 'trailingEps', 'beta',
+                      'dividendYield', 'fiftyTwoWeekHigh', 'fiftyTwoWeekLow')
+fundamentals_cache = TTLCache(maxsize=Config.FUNDAMENTALS_CACHE_SIZE, ttl=Config.FUNDAMENTALS_TTL)
+fundamentals_fetched_at = {}  # symbol -> when its cached fundamentals were fetched
+# Newly fetched fundamentals are copied to the shared cache for the next boot and the other workers
+fundamentals_snapshot = FundamentalsSnapshot(shared_quotes, interval=Config.SNAPSHOT_INTERVAL)
+# Columnar copy of the latest quote and fundamentals numbers for custom screens
+SCREEN_FIELDS = ('price', 'change', 'percent_change', 'volume') + FUNDAMENTAL_FIELDS[1:]
+screen_table = ScreenTable(SCREEN_FIELDS, universe=SCREEN_UNIVERSE)
+# Fills in fundamentals for screen symbols a few at a time, without bursts of stock.info calls
+screen_backfill = Backfill(lambda symbol: fetch_engine.submit(get_fundamentals, symbol),
+                           batch_size=Config.SCREEN_FUNDAMENTALS_PER_PASS,
+                           interval=Config.SCREEN_BACKFILL_INTERVAL, retry_after=Config.SCREEN_BACKFILL_RETRY)
+# Concurrent requests for the same uncached symbol share one upstream fetch
+upstream_flight = SingleFlight()
+news_cache = TTLCache(maxsize=Config.NEWS_CACHE_SIZE, ttl=Config.NEWS_TTL)
+news_fetched_at = {}  # symbol -> when its cached news was fetched
+
+def oldest_quote_age() -> Optional[float]:
+    fetched = [quote.fetched_at for quote in list(stock_cache.values())]
+    return time.time() - min(fetched) if fetched else None
+
+metrics.gauge('lovestock_quote_cache_entries', 'Quotes held in stock_cache', callback=lambda: len(stock_cache))
+metrics.gauge('lovestock_quote_cache_oldest_age_seconds', 'Age of the oldest quote in stock_cache',
+              callback=oldest_quote_age)
+metrics.counter('lovestock_fundamentals_cache_lookups_total', 'Fundamentals cache lookups by result', ['result'],
+                callback=lambda: {('hit',): fundamentals_cache.hits, ('miss',): fundamentals_cache.misses})
+metrics.counter('lovestock_page_cache_lookups_total', 'Rendered page fragment cache lookups by result', ['result'],
+                callback=lambda: {('hit',): page_fragments.hits, ('miss',): page_fragments.misses})
+metrics.counter('lovestock_upstream_calls_coalesced_total', 'Fetches that waited on an identical in-flight fetch',
+                ['function'], callback=lambda: {(name,): counts['coalesced']
+                                                for name, counts in upstream_flight.stats().items()})
+metrics.gauge('lovestock_refresh_lag_seconds', 'How overdue the most overdue symbol was at the last refresh pass',
+              callback=lambda: refresh_scheduler.last_lag)
+metrics.gauge('lovestock_refresh_tracked_symbols', 'Symbols the refresh scheduler is tracking',
+              callback=refresh_scheduler.tracked)
+metrics.gauge('lovestock_upstream_in_flight', 'Upstream fetches running on the fetch engine',
+              callback=fetch_engine.in_flight)
+metrics.gauge('lovestock_refresher_leader', 'Whether this worker holds the refresher lease',
+              callback=lambda: int(shared_sync['leader']))
+metrics.gauge('lovestock_stream_watched_symbols', 'Symbols with an open /api/stream subscription',
+              callback=lambda: len(quote_broker.watched_symbols()))
+metrics.gauge('lovestock_stream_connections', 'Open /api/stream connections (each holds a server thread)',
+              callback=quote_broker.connections)
+
+# Detail-page timeframes served by slicing the local bar store:
+# timeframe -> (bar interval, window downloaded on first use, window shown)
+STORED_TIMEFRAMES = {
+    '1m': ('1h', '3mo', {'months': 1}),
+    '3m': ('1d', '1y', {'months': 3}),
+    '1y': ('1d', '1y', {'years': 1}),
+    '5y': ('1wk', '5y', {'years': 5})
+}
 
 def is_market_open() -> bool:
     """Check if the US stock market is currently open"""
@@ -44,85 +191,174 @@ def is_market_open() -> bool:
 
     return market_open <= current_time <= market_close
 
-def is_market_day(date):
-    """Check if date is a market trading day (excluding weekends)"""
-    # Convert to datetime if it's not already
-    if not isinstance(date, datetime):
-        date = pd.to_datetime(date)
-    return date.weekday() < 5  # 0-4 are Monday-Friday
-
-def format_large_number(number: float) -> str:
-    """
-    Format large numbers into human-readable format with suffixes (K, M, B, T)
-    3430000000000 -> 3.43T
-    1234567890 -> 1.23B
-    1234567 -> 1.23M
-    12345 -> 12.3K
-    """
-    suffixes = ['', 'K', 'M', 'B', 'T']
-    sign = '-' if number < 0 else '' # Handle negative numbers
-    number = abs(number)
-
-    # Find the appropriate suffix
-    magnitude = 0
-    while number >= 1000 and magnitude < len(suffixes) - 1:
-        magnitude += 1
-        number /= 1000.0
-
-    return f"{sign}{number:.2f}{suffixes[magnitude]}"
-
-def fetch_stock_data(symbol: str) -> Optional[dict]:
+def summarize_history(hist: pd.DataFrame) -> dict:
+    """Build the price fields of a Quote from a day of 1-minute bars"""
+    current_price = hist['Close'].iloc[-1]
+    open_price = hist['Open'].iloc[0]
+    price_change = current_price - open_price
+    volume = hist['Volume'].sum()
+
+    return {
+        'price': round(current_price, 2),
+        'change': round(price_change, 2),
+        'percent_change': round((price_change / open_price) * 100, 2),
+        'volume': int(volume),
+        'chart_data': hist['Close'].tolist()[-100:],
+        'updated_at': datetime.now().strftime('%H:%M:%S')
+    }
+
+def get_fundamentals(symbol: str) -> dict:
+    """Fundamentals (stock.info subset) for a symbol, served from fundamentals_cache when fresh"""
+    info = fundamentals_cache.get(symbol)
+    if info is None:
+        stockinfo = provider.info(symbol) or {}
+        info = {field: stockinfo[field] for field in FUNDAMENTAL_FIELDS if field in stockinfo}
+        fundamentals_cache.set(symbol, info)
+        fundamentals_fetched_at[symbol] = time.time()
+        screen_table.update(symbol, info, name=info.get('longName'))
+    return info
+
+@upstream_flight.coalesce
+def fetch_stock_data(symbol: str) -> Optional[Quote]:
     """Fetch current stock data with error handling"""
     try:
-        stock = yf.Ticker(symbol)
-        hist = stock.history(period="1d", interval="1m")
-
-        stockinfo = stock.info
-        marketcap = stockinfo.get('marketCap', 0)
-        marketcap = format_large_number(marketcap)
+        hist = provider.history(symbol, period="1d", interval="1m")
 
         if hist.empty:
             logger.warning(f"No data available for symbol: {symbol}")
             return None
 
-        current_price = hist['Close'].iloc[-1]
-        open_price = hist['Open'].iloc[0]
-        price_change = current_price - open_price
-        volume = hist['Volume'].sum()
+        stockinfo = get_fundamentals(symbol)
 
-        return {
-            'symbol': symbol,
-            'name': stock.info.get('longName', symbol),
-            'price': round(current_price, 2),
-            'change': round(price_change, 2),
-            'percent_change': round((price_change / open_price) * 100, 2),
-            'volume': format_large_number(volume),
-            'marketCap': marketcap,
-            'chart_data': hist['Close'].tolist()[-100:],
-            'updated_at': datetime.now().strftime('%H:%M:%S')
-        }
+        return Quote(symbol=symbol,
+                     name=stockinfo.get('longName', symbol),
+                     market_cap=stockinfo.get('marketCap', 0),
+                     **summarize_history(hist))
     except Exception as e:
         logger.error(f"Error fetching data for {symbol}: {str(e)}")
         return None
 
-def fetch_detailed_stock_data(symbol: str, timeframe: str = '1d') -> Optional[dict]:
-    """Fetch detailed stock data for the stock detail page"""
+def fetch_batch_history(symbols, period: str = '1d', interval: str = '1m') -> dict:
+    """Download bars for many symbols in one provider call, keyed by symbol"""
+    symbols = list(symbols)
+    if not symbols:
+        return {}
     try:
-        stock = yf.Ticker(symbol)
-
-        timeframe_params = {
-            '1d': ('1d', '5m'),
-            '1w': ('5d', '15m'),
-            '1m': ('1mo', '1h'),
-            '3m': ('3mo', '1d'),
-            '1y': ('1y', '1d'),
-            '5y': ('5y', '1w')
+        return provider.batch_history(symbols, period=period, interval=interval)
+    except Exception as e:
+        logger.error(f"Error in batch download of {len(symbols)} symbols: {str(e)}")
+        return {}
+
+def fetch_history(symbol: str, interval: str, period: str = None, start=None) -> pd.DataFrame:
+    """Download bars for the history store: a full `period`, or everything since `start`"""
+    return provider.history(symbol, period=period, interval=interval, start=start)
+
+history_store = HistoryStore(Config.HISTORY_DIR, fetch_history, max_age=Config.HISTORY_MAX_AGE,
+                             observe=observe_history)
+indicator_cache = IndicatorCache(maxsize=Config.INDICATOR_CACHE_SIZE)
+# Chart payloads per (symbol, timeframe, resolution, indicators, bars); a new bar is a new key
+chart_cache = TTLCache(maxsize=Config.CHART_CACHE_SIZE, ttl=Config.HISTORY_MAX_AGE)
+
+def chart_series(symbol: str, timeframe: str, hist: pd.DataFrame, max_points: Optional[int],
+                 indicators: bool) -> dict:
+    """Columnar chart data for the detail page, downsampled to about max_points (dates are epoch ms)"""
+    if max_points and len(hist) <= max_points:
+        max_points = None
+    key = (symbol, timeframe, max_points, indicators, hist.index[0], hist.index[-1], len(hist),
+           float(hist['Close'].iloc[-1]))
+    cached = chart_cache.get(key)
+    if cached is not None:
+        return cached
+
+    dates = hist.index.asi8 // 1_000_000
+    prices = hist[['Open', 'High', 'Low', 'Close']].round(2)
+    volume = hist['Volume'].fillna(0).astype('int64').to_numpy()
+    overlays = None
+    if indicators:
+        # Intraday timeframes anchor VWAP to each session
+        overlays = indicator_cache.get(symbol, timeframe, hist, intraday=timeframe not in STORED_TIMEFRAMES)
+
+    if not max_points:
+        data = {
+            'dates': dates.tolist(),
+            'open': prices['Open'].tolist(),
+            'high': prices['High'].tolist(),
+            'low': prices['Low'].tolist(),
+            'close': prices['Close'].tolist(),
+            'volume': volume.tolist()
         }
-        period, interval = timeframe_params.get(timeframe, ('1d', '5m'))
+        if overlays is not None:
+            data['indicators'] = overlays
+    else:
+        close = prices['Close'].to_numpy()
+        starts, candles = ohlc_buckets(prices['Open'].to_numpy(), prices['High'].to_numpy(),
+                                       prices['Low'].to_numpy(), close, volume, max_points)
+        data = {'dates': dates[starts].tolist(), **{name: column.tolist() for name, column in candles.items()}}
+        picked = lttb(dates, close, max_points)
+        data['line'] = {'dates': dates[picked].tolist(), 'close': close[picked].tolist()}
+        if overlays is not None:
+            ends = np.append(starts[1:], len(hist)) - 1
+            data['indicators'] = {name: [values[i] for i in ends] for name, values in overlays.items()}
+
+    chart_cache.set(key, data)
+    return data
+
+def fetch_quotes(symbols, local_fundamentals=frozenset()) -> dict:
+    """Quotes for many symbols from one batch download, keyed by symbol (failed symbols left out)"""
+    symbols = list(dict.fromkeys(symbols))
+    histories = fetch_batch_history(symbols)
+
+    def build_quote(symbol):
+        hist = histories.get(symbol)
+        if hist is None:
+            return None if symbol in local_fundamentals else fetch_stock_data(symbol)
+        try:
+            # local_fundamentals never go upstream for fundamentals; screen_backfill fills them in
+            if symbol in local_fundamentals and symbol not in fundamentals_cache:
+                previous = stock_cache.get(symbol)
+                info = {'longName': previous.name, 'marketCap': previous.market_cap} if previous else {}
+            else:
+                info = get_fundamentals(symbol)
+            return Quote(symbol=symbol,
+                         name=info.get('longName', symbol),
+                         market_cap=info.get('marketCap', 0),
+                         **summarize_history(hist))
+        except Exception as e:
+            logger.error(f"Error building quote for {symbol}: {str(e)}")
+            return None
 
-        hist = stock.history(period=period, interval=interval)
+    # Cached fundamentals make most quotes local work; only the rest go to the fetch engine
+    quotes = {}
+    remote = [symbol for symbol in symbols if symbol not in histories or
+              (symbol not in fundamentals_cache and symbol not in local_fundamentals)]
+    for symbol in symbols:
+        if symbol not in remote:
+            quotes[symbol] = build_quote(symbol)
+    quotes.update(fetch_engine.stream(build_quote, remote))
+    return {symbol: quote for symbol, quote in quotes.items() if isinstance(quote, Quote)}
+
+@upstream_flight.coalesce
+def fetch_detailed_stock_data(symbol: str, timeframe: str = '1d', indicators: bool = False,
+                              max_points: Optional[int] = None) -> Optional[dict]:
+    """Fetch detailed stock data for the stock detail page"""
+    try:
+        # Fundamentals come from a separate upstream call; fetch them while the bars load
+        fundamentals = fetch_engine.submit(get_fundamentals, symbol) if symbol not in fundamentals_cache else None
 
-        info = stock.info
+        if timeframe in STORED_TIMEFRAMES:
+            interval, period, window = STORED_TIMEFRAMES[timeframe]
+            since = pd.Timestamp.now(tz='America/New_York') - pd.DateOffset(**window)
+            hist = history_store.get(symbol, interval, period, since=since)
+        else:
+            # Intraday timeframes change every few minutes, so they are fetched live
+            timeframe_params = {
+                '1d': ('1d', '5m'),
+                '1w': ('5d', '15m')
+            }
+            period, interval = timeframe_params.get(timeframe, ('1d', '5m'))
+            hist = provider.history(symbol, period=period, interval=interval)
+
+        info = fundamentals.result() if fundamentals is not None else get_fundamentals(symbol)
 
         # Filter out weekends and after-hours for 1d timeframe
         if timeframe == '1d':
@@ -130,22 +366,13 @@ def fetch_detailed_stock_data(symbol: str, timeframe: str = '1d') -> Optional[di
                            ((hist.index.hour == 16) & (hist.index.minute == 0))
             hist = hist[market_hours]
         else:
-            # Filter out weekends from other timeframes
-            hist = hist[hist.index.map(is_market_day)]
+            # Filter out weekends from other timeframes (0-4 are Monday-Friday)
+            hist = hist[hist.index.dayofweek < 5]
 
         if hist.empty:
             return None
 
-        # Format historical data
-        hist_data = [{
-            'date': index.isoformat(),
-            'price': round(row['Close'], 2),
-            'open': round(row['Open'], 2),
-            'high': round(row['High'], 2),
-            'low': round(row['Low'], 2),
-            'close': round(row['Close'], 2),
-            'volume': int(row['Volume'])
-        } for index, row in hist.iterrows()]
+        hist_data = chart_series(symbol, timeframe, hist, max_points, indicators)
 
         current_price = hist['Close'].iloc[-1]
         open_price = hist['Open'].iloc[0]
@@ -153,7 +380,7 @@ def fetch_detailed_stock_data(symbol: str, timeframe: str = '1d') -> Optional[di
 
         return {
             'symbol': symbol,
-            'name': stock.info.get('longName', symbol),
+            'name': info.get('longName', symbol),
             'price': round(current_price, 2),
             'change': round(price_change, 2),
             'percent_change': round((price_change / open_price) * 100, 2),
@@ -162,67 +389,25 @@ def fetch_detailed_stock_data(symbol: str, timeframe: str = '1d') -> Optional[di
                 'Open': round(open_price, 2),
                 'High': round(hist['High'].max(), 2),
                 'Low': round(hist['Low'].min(), 2),
-                'Volume': format_large_number(hist['Volume'].sum()),
-                'Market Cap': format_large_number(stock.info.get('marketCap', 0)),
-                'P/E Ratio': f"{stock.info.get('forwardPE', 'N/A'):.2f}" if isinstance(stock.info.get('forwardPE'), (int, float)) else 'N/A',
-                'EPS': f"{stock.info.get('trailingEps', 'N/A'):.2f}" if isinstance(stock.info.get('trailingEps'), (int, float)) else 'N/A',
-                'Beta': f"{stock.info.get('beta', 'N/A'):.2f}" if isinstance(stock.info.get('beta'), (int, float)) else 'N/A',
-                'Dividend Yield': f"{stock.info.get('dividendYield', 0) * 100:.2f}%" if stock.info.get('dividendYield') else 'N/A',
-                '52 Week High': round(stock.info.get('fiftyTwoWeekHigh', 0), 2) if stock.info.get('fiftyTwoWeekHigh') else 'N/A',
-                '52 Week Low': round(stock.info.get('fiftyTwoWeekLow', 0), 2) if stock.info.get('fiftyTwoWeekLow') else 'N/A'
+                'Volume': int(hist['Volume'].sum()),
+                'Market Cap': info.get('marketCap', 0),
+                'P/E Ratio': f"{info.get('forwardPE', 'N/A'):.2f}" if isinstance(info.get('forwardPE'), (int, float)) else 'N/A',
+                'EPS': f"{info.get('trailingEps', 'N/A'):.2f}" if isinstance(info.get('trailingEps'), (int, float)) else 'N/A',
+                'Beta': f"{info.get('beta', 'N/A'):.2f}" if isinstance(info.get('beta'), (int, float)) else 'N/A',
+                'Dividend Yield': f"{info.get('dividendYield', 0) * 100:.2f}%" if info.get('dividendYield') else 'N/A',
+                '52 Week High': round(info.get('fiftyTwoWeekHigh', 0), 2) if info.get('fiftyTwoWeekHigh') else 'N/A',
+                '52 Week Low': round(info.get('fiftyTwoWeekLow', 0), 2) if info.get('fiftyTwoWeekLow') else 'N/A'
             }
         }
     except Exception as e:
         logger.error(f"Error fetching detailed data for {symbol}: {str(e)}")
         return None
 
-def fetch_sector_data(sector_symbols):
-    """Fetch data for all symbols in industry sectors"""
-    sector_data = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {executor.submit(fetch_stock_data, symbol): symbol for symbol in sector_symbols}
-        for future in futures:
-            try:
-                data = future.result()
-                if data:
-                    sector_data.append(data)
-            except Exception as e:
-                logger.error(f"Error fetching sector data: {str(e)}")
-    return sector_data
-def calculate_industry_performance(industries):
-    performance = {}
-    for industry, symbols in industries.items():
-        industry_data = fetch_sector_data(symbols)
-        if industry_data:
-            avg_change = sum(stock['percent_change'] for stock in industry_data) / len(industry_data)
-            total_volume = sum(float(stock['volume'].replace('B', '000M').replace('M', '000K').replace('K', ''))
-                               for stock in industry_data)
-            performance[industry] = {
-                'change': avg_change,
-                'volume': format_large_number(total_volume),
-                'stocks': len(industry_data)
-            }
-    return performance
-def calculate_sector_performance(sectors):
-    performance = {}
-    for sector, symbols in sectors.items():
-        sector_data = fetch_sector_data(symbols)
-        if sector_data:
-            avg_change = sum(stock['percent_change'] for stock in sector_data) / len(sector_data)
-            total_volume = sum(float(stock['volume'].replace('B', '000M').replace('M', '000K').replace('K', ''))
-                               for stock in sector_data)
-            performance[sector] = {
-                'change': avg_change,
-                'volume': format_large_number(total_volume),
-                'stocks': len(sector_data)
-            }
-    return performance
-
+@upstream_flight.coalesce
 def fetch_stock_news(symbol: str) -> list:
     """Fetch news with preview for a specific stock"""
     try:
-        stock = yf.Ticker(symbol)
-        news = stock.news
+        news = provider.news(symbol)
         formatted_news = []
 
         for item in news[:5]:  # Limit to 5 most recent news items
@@ -241,76 +426,350 @@ def fetch_stock_news(symbol: str) -> list:
                 'image_url': image_url
             })
 
+        fetched_at = time.time()
+        news_cache.set(symbol, formatted_news)
+        news_fetched_at[symbol] = fetched_at
+        share_news(symbol, formatted_news, fetched_at)
         return formatted_news
     except Exception as e:
         logger.error(f"Error fetching news for {symbol}: {str(e)}")
         return []
 
+def share_news(symbol: str, news: list, fetched_at: float):
+    """Write news fetched by this worker to the shared cache for the other workers"""
+    try:
+        shared_quotes.put_news(symbol, news, fetched_at)
+    except Exception as e:
+        logger.error(f"Error writing shared news for {symbol}: {str(e)}")
+
+def load_shared_news(symbol: str) -> Optional[list]:
+    """News another worker stored in the shared cache, if still within NEWS_TTL"""
+    shared = shared_quotes.load_news(symbol)
+    if shared is None or shared[1] <= news_fetched_at.get(symbol, 0.0):
+        return None
+    news, fetched_at = shared
+    remaining = fetched_at + Config.NEWS_TTL - time.time()
+    if remaining <= 0:
+        return None
+    # Held briefly, so the refresher's next copy is picked up
+    news_cache.set(symbol, news, ttl=min(remaining, Config.NEWS_REFRESH_INTERVAL))
+    news_fetched_at[symbol] = fetched_at
+    return news
+
+def cached_news(symbol: str) -> Optional[list]:
+    """News for a symbol from this worker's cache or the shared cache, without going upstream"""
+    news = news_cache.get(symbol)
+    if news is None:
+        try:
+            news = load_shared_news(symbol)
+        except Exception as e:
+            logger.error(f"Error reading shared news for {symbol}: {str(e)}")
+    return news
+
+def refresh_popular_news():
+    """Refetch news ahead of expiry for streamed and recently viewed symbols (refresher only)"""
+    now = time.time()
+    popular = shared_quotes.recently_viewed(since=now - Config.DEMAND_HOT_WINDOW, limit=Config.NEWS_REFRESH_SYMBOLS)
+    for symbol in dict.fromkeys(list(quote_broker.watched_symbols()) + popular):
+        if now - news_fetched_at.get(symbol, 0) > Config.NEWS_REFRESH_INTERVAL:
+            load_shared_news(symbol)  # Another worker may have fetched it on a cache miss
+        if now - news_fetched_at.get(symbol, 0) > Config.NEWS_REFRESH_INTERVAL:
+            news_fetched_at[symbol] = now  # Don't resubmit while the fetch is in flight
+            fetch_engine.submit(fetch_stock_news, symbol)
+
+def stale_snapshot() -> set:
+    with quote_versions_lock:
+        return set(stale_symbols)
+
+def data_version(symbols) -> tuple:
+    """Content versions of these symbols' quotes; changes whenever any of them does"""
+    return tuple(quote_versions.get(symbol, 0) for symbol in symbols)
+
+def cached_fragment(key: tuple, render) -> Markup:
+    """Rendered HTML for a session-independent part of a page, cached under key"""
+    html = page_fragments.get(key)
+    if html is None:
+        html = Markup(render())
+        page_fragments.set(key, html)
+    return html
+
+def quote_response(quote: Quote) -> Response:
+    """JSON for a quote with an ETag of its content, answering a matching If-None-Match with 304"""
+    cached = quote_payloads.get(quote.symbol)
+    if cached is None or cached[0] is not quote:
+        body = app.json.dumps(quote.to_dict())
+        cached = (quote, hashlib.blake2b(body.encode(), digest_size=12).hexdigest(), body)
+        quote_payloads[quote.symbol] = cached
+    response = Response(cached[2], mimetype='application/json')
+    response.set_etag(cached[1])
+    response.headers['Cache-Control'] = 'no-cache'  # Revalidate every time; unchanged quotes cost a 304
+    return response.make_conditional(request)
+
+def touch_symbols(symbols):
+    """Mark symbols as in demand, here and for whichever worker holds the refresher lease"""
+    refresh_scheduler.touch(symbols)
+    shared_quotes.record_demand(symbols)
+
+def share_quotes(quotes: dict):
+    """Write quotes fetched by this worker to the shared cache for the other workers"""
+    try:
+        version = shared_quotes.put_many({symbol: quote.to_record() for symbol, quote in quotes.items()})
+        with shared_sync_lock:
+            if version == shared_sync['version'] + 1:
+                shared_sync['version'] = version  # Nothing else was written in between; no need to read it back
+    except Exception as e:
+        logger.error(f"Error writing shared quote cache: {str(e)}")
+
+def sync_shared_quotes():
+    """Apply quotes other workers wrote to the shared cache since the last sync"""
+    with shared_sync_lock:
+        since = shared_sync['version']
+    latest, records = shared_quotes.changed_since(since)
+    for symbol, record in records.items():
+        current = stock_cache.get(symbol)
+        if current is None or record['fetched_at'] > current.fetched_at:
+            publish_quote(symbol, Quote(**record), share=False)
+    with shared_sync_lock:
+        shared_sync['version'] = max(shared_sync['version'], latest)
+
+def is_stale(quote: Quote, now: float) -> bool:
+    """Older than QUOTE_STALE_AFTER, unless the market is closed and the quote is from after the close"""
+    if now - quote.fetched_at <= Config.QUOTE_STALE_AFTER:
+        return False
+    return seconds_until_market_open(now) == 0 or quote.fetched_at < last_market_close(now)
+
+def publish_quote(symbol: str, quote: Quote, share: bool = True):
+    """Store a fresh quote, update the rollups and screen table, and stream it if it changed"""
+    stale = is_stale(quote, time.time())
+    with quote_versions_lock:
+        previous = stock_cache.get(symbol)
+        stock_cache[symbol] = quote
+        stale_changed = stale != (symbol in stale_symbols)
+        if stale_changed:
+            (stale_symbols.add if stale else stale_symbols.discard)(symbol)
+        if previous is None or stale_changed or (previous.price, previous.change, previous.volume,
+                                                 previous.updated_at, previous.market_cap) != \
+                (quote.price, quote.change, quote.volume, quote.updated_at, quote.market_cap):
+            quote_versions[symbol] = quote_versions.get(symbol, 0) + 1
+    if previous is None or (previous.price, previous.change, previous.volume) != \
+            (quote.price, quote.change, quote.volume):
+        quote_broker.publish(symbol, quote)
+    sector_aggregates.update(symbol, quote.percent_change, quote.volume)
+    industry_aggregates.update(symbol, quote.percent_change, quote.volume)
+    screen_table.update(symbol, {'price': quote.price, 'change': quote.change, 'percent_change': quote.percent_change,
+                                 'volume': quote.volume, 'marketCap': quote.market_cap or np.nan},  # 0 means unknown
+                        name=quote.name)
+    if share:
+        share_quotes({symbol: quote})
+
+def snapshot_fundamentals():
+    """Write fundamentals fetched since the last snapshot to the shared cache, for the next boot"""
+    fundamentals_snapshot.write(dict(fundamentals_fetched_at), fundamentals_cache.get)
+
+def load_shared_fundamentals(since: float) -> int:
+    """Adopt fundamentals written to the shared cache that were fetched after `since`; returns how many"""
+    now = time.time()
+    loaded = 0
+    for symbol, (info, fetched_at) in shared_quotes.load_fundamentals(since=since).items():
+        if fetched_at > fundamentals_fetched_at.get(symbol, 0.0):
+            fundamentals_cache.set(symbol, info, ttl=fetched_at + Config.FUNDAMENTALS_TTL - now)
+            fundamentals_fetched_at[symbol] = fetched_at
+            screen_table.update(symbol, info, name=info.get('longName'))
+            loaded += 1
+    return loaded
+
+def restore_snapshot():
+    """Warm start from the quotes and fundamentals the previous run left in the shared cache"""
+    started = time.perf_counter()
+    sync_shared_quotes()
+    restored = load_shared_fundamentals(since=time.time() - Config.FUNDAMENTALS_TTL)
+    fundamentals_snapshot.covered = max(fundamentals_fetched_at.values(), default=0.0)
+    logger.info(f"Restored {len(stock_cache)} quotes ({len(stale_symbols)} stale) and {restored} "
+                f"fundamentals in {time.perf_counter() - started:.3f}s")
+
+def refresh_stock_cache(symbols) -> tuple:
+    """Refresh stock_cache for many symbols; returns (symbols refreshed, seconds taken)"""
+    started = time.perf_counter()
+    symbols = list(dict.fromkeys(symbols))
+    quotes = fetch_quotes(symbols, local_fundamentals=SCREEN_ONLY_SYMBOLS)
+    refresh_scheduler.record_results(quotes, [symbol for symbol in symbols if symbol not in quotes])
+    for symbol, quote in quotes.items():
+        publish_quote(symbol, quote, share=False)
+    if quotes:
+        share_quotes(quotes)  # One write for the whole pass
+    refreshed = len(quotes)
+
+    elapsed = time.perf_counter() - started
+    refresh_duration.observe(elapsed)
+    refresh_stats.update(refreshed=refreshed, requested=len(symbols),
+                         duration=elapsed, finished_at=time.time())
+    logger.info(f"Refreshed {refreshed}/{len(symbols)} symbols in {elapsed:.2f}s "
+                f"(fundamentals cache {fundamentals_cache.stats()})")
+    return refreshed, elapsed
+
 def update_stock_cache():
-    """Background task to update stock data"""
+    """Background task to sync stock data with the shared cache and, on the lease holder, refresh it"""
     while True:
         try:
-            for symbol in DEFAULT_STOCKS:
-                data = fetch_stock_data(symbol)
-                if data:
-                    stock_cache[symbol] = data
-            time.sleep(Config.CACHE_REFRESH_INTERVAL)
+            refresh_scheduler.wakeup.clear()
+            shared_quotes.record_demand(quote_broker.watched_symbols())
+            shared_quotes.flush_demand()
+            sync_shared_quotes()
+            if fundamentals_snapshot.due():
+                snapshot_fundamentals()
+                # Pick up what other workers fetched; each snapshot covers at most the interval before it
+                load_shared_fundamentals(since=time.time() - 3 * Config.SNAPSHOT_INTERVAL)
+
+            leader = shared_quotes.acquire_lease()
+            if leader != shared_sync['leader']:
+                logger.info(f"{'Took' if leader else 'Lost'} the quote refresher lease")
+                # A new refresher picks up everything still in demand on any worker
+                shared_sync['demand_seen'] = time.time() - Config.DEMAND_EXPIRY
+                shared_sync['leader'] = leader
+            if not leader:
+                refresh_scheduler.wakeup.wait(Config.SHARED_SYNC_INTERVAL)
+                continue
+
+            now = time.time()
+            # Overlap the window a little so requests committed just after the last read aren't missed
+            demand = shared_quotes.demand_since(shared_sync['demand_seen'] - Config.SHARED_SYNC_INTERVAL,
+                                                expire_before=now - Config.DEMAND_EXPIRY)
+            shared_sync['demand_seen'] = now
+            if demand:
+                refresh_scheduler.touch(demand)
+            symbols = refresh_scheduler.pop_due(watched=quote_broker.watched_symbols())
+            if symbols:
+                refresh_stock_cache(symbols)
+            refresh_popular_news()
+            screen_backfill.run(symbol for symbol in SCREEN_UNIVERSE if symbol not in fundamentals_cache)
+            # Sleep until the next symbol is due, or until a newly requested one arrives
+            refresh_scheduler.wakeup.wait(min(refresh_scheduler.seconds_until_due(),
+                                              Config.SHARED_SYNC_INTERVAL))
         except Exception as e:
             logger.error(f"Error in cache update thread: {str(e)}")
             time.sleep(Config.CACHE_REFRESH_INTERVAL * 2)  # Back off on error
 
-# Start the background thread
 update_thread = threading.Thread(target=update_stock_cache, daemon=True)
-update_thread.start()
+background_started = threading.Event()
+background_lock = threading.Lock()
+
+def start_background():
+    """Restore the last snapshot and start the refresher, once per process"""
+    with background_lock:
+        if background_started.is_set():
+            return
+        try:
+            restore_snapshot()
+        except Exception as e:
+            logger.error(f"Error restoring cache snapshot: {str(e)}")
+        update_thread.start()
+        atexit.register(shared_quotes.release_lease)  # Let another worker take over refreshing right away
+        atexit.register(snapshot_fundamentals)
+        background_started.set()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # Not at import: importing stays cheap, and each forked worker starts its own refresher
+    if not background_started.is_set():
+        start_background()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        route_latency.observe(time.perf_counter() - started, route=route, method=request.method)
+        route_requests.inc(route=route, status=str(response.status_code))
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.template_filter('large_number')
+def large_number_filter(number) -> str:
+    """Render raw volumes and market caps as 3.43T / 1.23B / 12.35K"""
+    if not isinstance(number, (int, float)):
+        return number
+    return format_large_number(number)
 
 @app.route('/')
 def index():
     sort_by = request.args.get('sort_by', 'symbol')
     try:
-        stocks = list(stock_cache.values())
-
-        if sort_by == 'price':
-            stocks.sort(key=lambda x: x['price'], reverse=True)
-        elif sort_by == 'percent_change':
-            stocks.sort(key=lambda x: x['percent_change'], reverse=True)
-        elif sort_by == 'volume':
-            stocks.sort(key=lambda x: x['volume'], reverse=True)
-        elif sort_by == 'marketCap':
-            stocks.sort(key=lambda x: x['marketCap'], reverse=True)
-        elif sort_by == 'name':
-            stocks.sort(key=lambda x: x['name'], reverse=True)
-        else:  # default to symbol
-            stocks.sort(key=lambda x: x['symbol'])
-
         watchlist = session.get('watchlist', [])
+        touch_symbols(watchlist)
+
+        def render_cards():
+            stocks = [stock_cache[symbol] for symbol in DEFAULT_STOCKS if symbol in stock_cache]
+
+            if sort_by == 'price':
+                stocks.sort(key=lambda x: x.price, reverse=True)
+            elif sort_by == 'percent_change':
+                stocks.sort(key=lambda x: x.percent_change, reverse=True)
+            elif sort_by == 'volume':
+                stocks.sort(key=lambda x: x.volume, reverse=True)
+            elif sort_by == 'marketCap':
+                stocks.sort(key=lambda x: x.market_cap, reverse=True)
+            elif sort_by == 'name':
+                stocks.sort(key=lambda x: x.name, reverse=True)
+            else:  # default to symbol
+                stocks.sort(key=lambda x: x.symbol)
+            return render_template('_market_cards.html', stocks=stocks, watchlist=watchlist,
+                                   max_watchlist=MAX_WATCHLIST_ITEMS, stale=stale_snapshot())
+
+        # Cards only differ per session in their add-to-watchlist buttons
+        if len(watchlist) < MAX_WATCHLIST_ITEMS:
+            watch_state = tuple(symbol for symbol in DEFAULT_STOCKS if symbol in watchlist)
+        else:
+            watch_state = 'full'
+        market_cards = cached_fragment(('index', sort_by, watch_state, data_version(DEFAULT_STOCKS)),
+                                       render_cards)
+
         watchlist_data = [stock_cache.get(symbol) for symbol in watchlist
                           if stock_cache.get(symbol)]
 
         return render_template('index.html',
-                               stocks=stocks,
+                               market_cards=market_cards,
                                watchlist=watchlist_data,
                                max_watchlist=MAX_WATCHLIST_ITEMS)
     except Exception as e:
         logger.error(f"Error in index route: {str(e)}")
         flash("An error occurred while loading the data", "error")
-        return render_template('index.html', stocks=[], watchlist=[])
+        return render_template('index.html', market_cards='', watchlist=[])
+
+def chart_points(points: Optional[int]) -> Optional[int]:
+    """Requested chart resolution, kept to a sane minimum (None or 0 means every bar)"""
+    return max(points, Config.CHART_MIN_POINTS) if points else None
 
 @app.route('/stock/<symbol>')
 def stock_detail(symbol):
     try:
         timeframe = request.args.get('timeframe', '1d')
-        stock_data = fetch_detailed_stock_data(symbol, timeframe)
+        show_indicators = request.args.get('indicators') == '1'
+        max_points = chart_points(request.args.get('points', Config.CHART_MAX_POINTS, type=int))
+
+        # News loads alongside the quote and history unless it is already cached
+        news = cached_news(symbol)
+        news_future = fetch_engine.submit(fetch_stock_news, symbol) if news is None else None
+        stock_data = fetch_detailed_stock_data(symbol, timeframe, indicators=show_indicators,
+                                               max_points=max_points)
 
         if not stock_data:
             flash(f"Unable to fetch data for {symbol}", "error")
             return redirect(url_for('index'))
+        # Only symbols that exist become tracked
+        touch_symbols([symbol])
+        shared_quotes.record_view(symbol)
 
-        news_data = fetch_stock_news(symbol)
+        news_data = news if news_future is None else news_future.result()
         watchlist = session.get('watchlist', [])
 
         return render_template('stock.html',
                                stock=stock_data,
                                timeframe=timeframe,
+                               show_indicators=show_indicators,
                                market_open=is_market_open(),
                                is_in_watchlist=symbol in watchlist,
                                max_watchlist=MAX_WATCHLIST_ITEMS,
@@ -320,24 +779,150 @@ def stock_detail(symbol):
         flash("Error loading stock details", "error")
         return redirect(url_for('index'))
 
+@app.route('/api/stock/<symbol>/indicators')
+def get_stock_indicators(symbol):
+    try:
+        timeframe = request.args.get('timeframe', '1d')
+        max_points = chart_points(request.args.get('points', type=int))
+        data = fetch_detailed_stock_data(symbol, timeframe, indicators=True, max_points=max_points)
+        if not data:
+            return jsonify({'error': 'Stock not found'}), 404
+        history = data['historical_data']
+        return jsonify({'symbol': data['symbol'], 'timeframe': timeframe,
+                        'dates': history['dates'], **history['indicators']})
+    except Exception as e:
+        logger.error(f"Error computing indicators for {symbol}: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @app.route('/api/stock/<symbol>/latest')
 def get_latest_stock_data(symbol):
+    symbol = symbol.upper()
     try:
         data = stock_cache.get(symbol)
+        quote_cache_lookups.inc(result='hit' if data else 'miss')
         if data:
-            return jsonify(data)
+            touch_symbols([symbol])
+            return quote_response(data)
 
         # If not in cache, fetch it
         data = fetch_stock_data(symbol)
         if data:
-            stock_cache[symbol] = data
-            return jsonify(data)
+            publish_quote(symbol, data)
+            touch_symbols([symbol])
+            return quote_response(data)
 
         return jsonify({'error': 'Stock not found'}), 404
     except Exception as e:
         logger.error(f"Error fetching latest stock data: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/api/stocks/latest')
+def get_latest_stocks_data():
+    """Many quotes in one response for ?symbols=AAPL,MSFT,..."""
+    try:
+        symbols = list(dict.fromkeys(
+            symbol.strip().upper() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()
+        ))[:Config.BULK_MAX_SYMBOLS]
+        if not symbols:
+            return jsonify({'error': 'No symbols requested'}), 400
+
+        sources = {symbol: 'cache' for symbol in symbols if symbol in stock_cache}
+        misses = [symbol for symbol in symbols if symbol not in sources]
+        quote_cache_lookups.inc(len(sources), result='hit')
+        quote_cache_lookups.inc(len(misses), result='miss')
+        fetched = fetch_quotes(misses)
+        for symbol, quote in fetched.items():
+            publish_quote(symbol, quote, share=False)
+            sources[symbol] = 'live'
+        if fetched:
+            share_quotes(fetched)  # One write for the whole batch
+
+        now = time.time()
+        quotes = {}
+        for symbol in symbols:
+            quote = stock_cache.get(symbol)
+            if quote is None or symbol not in sources:
+                continue
+            age = now - quote.fetched_at
+            quotes[symbol] = {
+                **quote.to_dict(),
+                'source': sources[symbol],
+                'age': round(age, 1),
+                'stale': is_stale(quote, now)
+            }
+        touch_symbols(list(quotes))
+
+        return jsonify({
+            'quotes': quotes,
+            'missing': [symbol for symbol in symbols if symbol not in quotes]
+        })
+    except Exception as e:
+        logger.error(f"Error fetching bulk stock data: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def run_screen(args) -> dict:
+    """Screen the universe from request args: filter, sort, order and page/page_size"""
+    where = args.get('filter', '').strip()
+    sort = args.get('sort', '').strip() or 'marketCap'
+    descending = args.get('order', 'desc') != 'asc'
+    page_size = min(max(args.get('page_size', Config.SCREEN_PAGE_SIZE, type=int), 1), Config.SCREEN_MAX_PAGE_SIZE)
+    page = max(args.get('page', 1, type=int), 1)
+    total, results = screen_table.screen(where or None, sort, descending,
+                                         offset=(page - 1) * page_size, limit=page_size)
+    return {
+        'filter': where,
+        'sort': sort,
+        'order': 'desc' if descending else 'asc',
+        'page': page,
+        'page_size': page_size,
+        'pages': max((total + page_size - 1) // page_size, 1),
+        'total': total,
+        'universe': len(screen_table),
+        'results': results
+    }
+
+@app.route('/api/screen')
+def screen_api():
+    """Custom screen over every tracked stock, e.g. ?filter=percent_change > 2 and marketCap > 10B&sort=volume"""
+    try:
+        return jsonify(run_screen(request.args))
+    except ScreenError as e:
+        return jsonify({'error': str(e), 'fields': list(SCREEN_FIELDS)}), 400
+    except Exception as e:
+        logger.error(f"Error running screen: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/api/stream')
+def stream_quotes():
+    """Server-Sent Events stream of changed quotes for ?symbols=AAPL,MSFT,..."""
+    symbols = [symbol.strip().upper() for symbol in request.args.get('symbols', '').split(',')
+               if symbol.strip()][:Config.STREAM_MAX_SYMBOLS]
+    if not symbols:
+        return jsonify({'error': 'No symbols requested'}), 400
+
+    subscription = quote_broker.subscribe(symbols, limit=Config.STREAM_MAX_CONNECTIONS)
+    if subscription is None:
+        # Every stream pins a server thread; past the limit, pages go without live updates
+        return jsonify({'error': 'Too many open streams'}), 503, {'Retry-After': str(Config.STREAM_MAX_DURATION)}
+    touch_symbols(symbols)  # Kept hot while the stream stays open, unless their refreshes keep failing
+
+    def events():
+        # Streams end after STREAM_MAX_DURATION so threads are handed back and clients reconnect
+        deadline = time.monotonic() + Config.STREAM_MAX_DURATION
+        try:
+            while time.monotonic() < deadline:
+                quotes = subscription.wait(timeout=Config.STREAM_HEARTBEAT)
+                if quotes is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                for quote in quotes:
+                    yield f"data: {json.dumps(quote.to_dict())}\n\n"
+        finally:
+            quote_broker.unsubscribe(subscription)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/screener')
 def stock_screener():
     try:
@@ -348,40 +933,50 @@ def stock_screener():
 
         if view_type == 'industries' and selected_industry:
             symbols = INDUSTRIES.get(selected_industry, [])
-            stocks_data = fetch_sector_data(symbols)
-            sector_performance = calculate_industry_performance(INDUSTRIES)
+            aggregates = industry_aggregates
         else:
             symbols = SECTORS.get(selected_sector, [])
-            stocks_data = fetch_sector_data(symbols)
-            sector_performance = calculate_sector_performance(SECTORS)
-
-        # Sort stocks based on criteria
-        if stocks_data:
-            if sort_by == 'price':
-                stocks_data.sort(key=lambda x: x['price'], reverse=True)
-            elif sort_by == 'percent_change':
-                stocks_data.sort(key=lambda x: x['percent_change'], reverse=True)
-            elif sort_by == 'volume':
-                stocks_data.sort(
-                    key=lambda x: float(x['volume'].replace('B', '000M').replace('M', '000K').replace('K', '')),
-                    reverse=True
-                )
-            elif sort_by == 'marketCap':
-                stocks_data.sort(
-                    key=lambda x: float(
-                        x['marketCap'].replace('T', '000B').replace('B', '000M').replace('M', '000K').replace('K', '')),
-                    reverse=True
-                )
-
-        return render_template('screener.html',
-                               sectors=SECTORS.keys(),
-                               industries=INDUSTRIES.keys(),
-                               selected_sector=selected_sector,
-                               selected_industry=selected_industry,
-                               view_type=view_type,
-                               sector_performance=sector_performance,
-                               stocks=stocks_data,
-                               sort_by=sort_by)
+            aggregates = sector_aggregates
+
+        # Constituents come from the background refresh only; ones it hasn't quoted are left out
+        def render_content():
+            stocks_data = [stock_cache[symbol] for symbol in symbols if symbol in stock_cache]
+            sector_performance = aggregates.snapshot()
+
+            # Sort stocks based on criteria
+            if stocks_data:
+                if sort_by == 'price':
+                    stocks_data.sort(key=lambda x: x.price, reverse=True)
+                elif sort_by == 'percent_change':
+                    stocks_data.sort(key=lambda x: x.percent_change, reverse=True)
+                elif sort_by == 'volume':
+                    stocks_data.sort(key=lambda x: x.volume, reverse=True)
+                elif sort_by == 'marketCap':
+                    stocks_data.sort(key=lambda x: x.market_cap, reverse=True)
+
+            return render_template('_screener_content.html',
+                                   sectors=SECTORS.keys(),
+                                   industries=INDUSTRIES.keys(),
+                                   selected_sector=selected_sector,
+                                   selected_industry=selected_industry,
+                                   view_type=view_type,
+                                   sector_performance=sector_performance,
+                                   stocks=stocks_data,
+                                   sort_by=sort_by)
+
+        # The rollups cover every group, so any screener symbol's change invalidates the page
+        key = ('screener', view_type, selected_sector, selected_industry, sort_by,
+               data_version(aggregates.symbols))
+
+        # Custom screen over the whole universe, once the user submits one
+        screen, screen_error = None, None
+        if 'filter' in request.args:
+            try:
+                screen = run_screen(request.args)
+            except ScreenError as e:
+                screen_error = str(e)
+        return render_template('screener.html', screener_content=cached_fragment(key, render_content),
+                               screen=screen, screen_error=screen_error, screen_fields=SCREEN_FIELDS)
 
     except Exception as e:
         logger.error(f"Error in screener route: {str(e)}")
@@ -430,46 +1025,37 @@ def remove_from_watchlist():
 
 @app.route('/search')
 def search():
-    query = request.args.get('q', '').strip().upper()
+    query = request.args.get('q', '').strip()
     if len(query) < 1:
         return jsonify([])
 
     try:
         logger.info(f"Searching for symbol: {query}")
-        results = []
+        symbols = symbol_index.search(query, limit=Config.SEARCH_MAX_RESULTS)
 
-        # First check cache for exact matches
-        cached_matches = [stock for stock in DEFAULT_STOCKS if query == stock]
-        for symbol in cached_matches:
-            data = stock_cache.get(symbol)
+        # Unknown to the index: if it looks like a ticker, try it upstream once
+        if not symbols and TICKER_PATTERN.match(query.upper()):
+            data = fetch_stock_data(query.upper())
             if data:
-                results.append(data)
+                publish_quote(data.symbol, data)
+                symbol_index.add(data.symbol, data.name)
+                symbols = [data.symbol]
+
+        # Live quotes only for the top hits; fetch the uncached ones in one batch
+        quoted = symbols[:Config.SEARCH_QUOTE_HITS]
+        fetched = fetch_quotes([s for s in quoted if s not in stock_cache])
+        for symbol, quote in fetched.items():
+            publish_quote(symbol, quote, share=False)
+        if fetched:
+            share_quotes(fetched)  # One write for the whole batch
 
-        # If query is not in cache, try to fetch it directly
-        if not results and len(query) >= 1:
-            data = fetch_stock_data(query)
-            if data:
-                results.append(data)
-                stock_cache[query] = data
-
-        # If still no results, look for partial matches in cache
-        if not results:
-            partial_matches = [stock for stock in DEFAULT_STOCKS if query in stock]
-            for symbol in partial_matches:
-                data = stock_cache.get(symbol)
-                if data:
-                    results.append(data)
-
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_results = []
-        for item in results:
-            if item['symbol'] not in seen:
-                seen.add(item['symbol'])
-                unique_results.append(item)
-
-        logger.info(f"Returning {len(unique_results)} results")
-        return jsonify(unique_results[:5])
+        results = []
+        for symbol in symbols:
+            quote = stock_cache.get(symbol) if symbol in quoted else None
+            results.append(quote.to_dict() if quote else {'symbol': symbol, 'name': symbol_index.name(symbol)})
+
+        logger.info(f"Returning {len(results)} results")
+        return jsonify(results)
 
     except Exception as e:
         logger.error(f"Search error: {str(e)}")
@@ -0,0 +1,113 @@
+"""
+Load benchmark for Lovestock, run fully offline against the replay data provider.
+Drives the main routes through the Flask test client from concurrent threads and
+reports throughput and p50/p99 latency per route.
+
+    python bench.py --requests 300 --concurrency 16 --latency 0.05
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SYMBOLS = ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL', 'META', 'TSLA', 'JPM', 'XOM', 'CRM']
+TIMEFRAMES = ['1d', '1w', '1m', '3m', '1y', '5y']
+SEARCHES = ['A', 'AP', 'APP', 'apple', 'N', 'NV', 'NVD', 'nvidia', 'micro', 'tesla']
+SECTOR_VIEWS = ['sector=Technology', 'sector=Energy&sort_by=volume',
+                'view=industries&industry=Software', 'view=industries&industry=Cloud%20Computing']
+
+
+def scenarios() -> dict:
+    """Route name -> endless iterator of URLs to request"""
+    return {
+        '/': (f"/?sort_by={key}" for key in itertools.cycle(['symbol', 'price', 'marketCap'])),
+        '/screener': (f"/screener?{view}" for view in itertools.cycle(SECTOR_VIEWS)),
+        '/stock/<symbol>': (f"/stock/{symbol}?timeframe={timeframe}"
+                            for symbol, timeframe in itertools.cycle(itertools.product(SYMBOLS, TIMEFRAMES))),
+        '/search': (f"/search?q={query}" for query in itertools.cycle(SEARCHES)),
+        '/api/stock/<symbol>/latest': (f"/api/stock/{symbol}/latest" for symbol in itertools.cycle(SYMBOLS)),
+        '/api/stocks/latest': (f"/api/stocks/latest?symbols={','.join(SYMBOLS)}" for _ in itertools.count())
+    }
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_scenario(flask_app, urls, requests: int, concurrency: int) -> dict:
+    local = threading.local()
+    url_lock = threading.Lock()
+
+    def one_request(_):
+        if not hasattr(local, 'client'):
+            local.client = flask_app.test_client()
+        with url_lock:
+            url = next(urls)
+        started = time.perf_counter()
+        response = local.client.get(url)
+        elapsed = time.perf_counter() - started
+        # Error paths redirect to / (302), so only 200 and 304 count as served
+        return elapsed, response.status_code in (200, 304)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one_request, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed for elapsed, _ in results)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, ok in results if not ok),
+        'throughput': requests / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent client threads')
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated seconds per upstream call')
+    parser.add_argument('--record-dir', help='replay recorded responses from this directory')
+    parser.add_argument('--no-warmup', action='store_true', help='start measuring before the first refresh pass')
+    args = parser.parse_args()
+
+    # The provider is chosen when app is imported, so configure it first
+    os.environ['LOVESTOCK_DATA_PROVIDER'] = 'replay'
+    os.environ['LOVESTOCK_REPLAY_LATENCY'] = str(args.latency)
+    if args.record_dir:
+        os.environ['LOVESTOCK_RECORD_DIR'] = args.record_dir
+    # Start from empty caches every run
+    cache_dir = tempfile.mkdtemp(prefix='lovestock-bench-')
+    os.environ['LOVESTOCK_SHARED_CACHE'] = os.path.join(cache_dir, 'quotes.db')
+    import app as lovestock
+    from history_store import HistoryStore
+
+    lovestock.history_store = HistoryStore(os.path.join(cache_dir, 'history'), lovestock.fetch_history,
+                                           max_age=lovestock.Config.HISTORY_MAX_AGE,
+                                           observe=lovestock.observe_history)
+
+    lovestock.start_background()
+    if not args.no_warmup:
+        deadline = time.time() + 60
+        while not lovestock.refresh_stats and time.time() < deadline:
+            time.sleep(0.1)
+
+    print(f"{args.requests} requests/route, concurrency {args.concurrency}, "
+          f"upstream latency {args.latency * 1000:.0f} ms")
+    print(f"{'route':<28}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, urls in scenarios().items():
+        result = run_scenario(lovestock.app, urls, args.requests, args.concurrency)
+        print(f"{name:<28}{result['throughput']:>10.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}{result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
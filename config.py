@@ -1,5 +1,10 @@
+import os
+
 # Application Configuration
 class Config:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    CACHE_DIR = os.path.join(BASE_DIR, 'cache')  # Local caches, wherever the app is started from
+
     PORT = 5000
     HOST = '127.0.0.1'
     DEBUG = True  # Set to False for production
@@ -40,5 +45,63 @@ class Config:
 
     MAX_WATCHLIST_ITEMS = 10
     CACHE_REFRESH_INTERVAL = 5
+    COLD_REFRESH_INTERVAL = 60  # Seconds between refreshes of screener constituents and cooling symbols
+    DEMAND_HOT_WINDOW = 5 * 60  # Symbols requested this recently refresh every CACHE_REFRESH_INTERVAL
+    DEMAND_EXPIRY = 30 * 60  # Symbols nobody requested for this long stop being refreshed
+    REFRESH_MAX_FAILURES = 3  # Requested symbols whose refreshes fail this many times in a row are dropped
+    FUNDAMENTALS_TTL = 6 * 60 * 60  # Seconds before stock.info fields are fetched again
+    FUNDAMENTALS_CACHE_SIZE = 2048
+
+    HISTORY_DIR = os.path.join(CACHE_DIR, 'history')  # On-disk OHLCV bar store for the stock detail page
+    HISTORY_MAX_AGE = 300  # Seconds before a stored series fetches its newest bars again
+    INDICATOR_CACHE_SIZE = 256  # (symbol, timeframe) series kept with computed chart indicators
+    CHART_MAX_POINTS = 300  # About one point per pixel of chart width; longer series are downsampled
+    CHART_MIN_POINTS = 20
+    CHART_CACHE_SIZE = 512
+
+    # Market data source: 'yfinance', 'replay' (offline synthetic/recorded data for
+    # load tests) or 'record' (yfinance, saving responses to RECORD_DIR for replay)
+    DATA_PROVIDER = os.environ.get('LOVESTOCK_DATA_PROVIDER', 'yfinance')
+    REPLAY_LATENCY = float(os.environ.get('LOVESTOCK_REPLAY_LATENCY', '0'))  # Seconds per replayed call
+    RECORD_DIR = os.environ.get('LOVESTOCK_RECORD_DIR')
+    FETCH_CONCURRENCY = 16  # Upstream calls in flight at once, across all requests and the refresher
+    # (a batch download runs its per-ticker requests on up to this many threads of its own)
+
+    # Quotes shared by all worker processes on the host; one worker at a time holds the
+    # refresher lease and polls upstream, the others sync from the file
+    SHARED_CACHE_PATH = os.environ.get('LOVESTOCK_SHARED_CACHE', os.path.join(CACHE_DIR, 'quotes.db'))
+    SHARED_SYNC_INTERVAL = 1  # Seconds between syncs with the shared cache
+    REFRESH_LEASE_TTL = 30  # Seconds before a silent refresher's lease can be taken over
+    SNAPSHOT_INTERVAL = 60  # Seconds between writes of newly fetched fundamentals to the shared cache
+
+    NEWS_TTL = 30 * 60
+    NEWS_REFRESH_INTERVAL = 10 * 60  # Popular symbols' news is refetched this often, ahead of NEWS_TTL
+    NEWS_REFRESH_SYMBOLS = 20  # Most viewed detail pages (within DEMAND_HOT_WINDOW) kept warm
+    NEWS_CACHE_SIZE = 512
+
+    PAGE_CACHE_SIZE = 256  # Rendered dashboard/screener fragments, keyed by view and data version
+    PAGE_CACHE_TTL = 10 * 60
+
+    STREAM_HEARTBEAT = 15  # Seconds between keep-alive comments on idle /api/stream connections
+    STREAM_MAX_SYMBOLS = 50
+    # Each open stream holds a worker thread: keep this below the server's threads per worker
+    # (e.g. gunicorn -k gthread --threads 64) so streams can't take every thread
+    STREAM_MAX_CONNECTIONS = 32
+    STREAM_MAX_DURATION = 10 * 60  # Seconds before a stream is closed; EventSource reconnects on its own
+    BULK_MAX_SYMBOLS = 100  # Symbols per /api/stocks/latest request
+    QUOTE_STALE_AFTER = 30  # Seconds after which a served quote is flagged as stale
+
+    TICKER_LIST = os.path.join(BASE_DIR, 'data', 'tickers.csv')
+    SEARCH_MAX_RESULTS = 8
+    SEARCH_QUOTE_HITS = 3  # Search results that get live quote data attached
+
+    # Custom screens (/screener filter box, /api/screen) run over every stock in TICKER_LIST
+    SCREEN_PAGE_SIZE = 50
+    SCREEN_MAX_PAGE_SIZE = 200
+    # Universe-only symbols get their fundamentals from a background backfill instead of the quote
+    # refresh: a batch every SCREEN_BACKFILL_INTERVAL seconds, failed symbols retried after a while
+    SCREEN_FUNDAMENTALS_PER_PASS = 5
+    SCREEN_BACKFILL_INTERVAL = 5
+    SCREEN_BACKFILL_RETRY = 30 * 60
 
 
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of at most `threshold` points chosen by Largest-Triangle-Three-Buckets:
+    the first and last points, plus from each bucket in between the point forming
+    the largest triangle with the previously chosen point and the next bucket's mean.
+    Keeps peaks and troughs that plain striding would skip.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    # threshold - 2 buckets between the fixed first and last points
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(int) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[end:edges[i + 2]].mean(), y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        areas = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def bucket_edges(n: int, buckets: int) -> np.ndarray:
+    """Start index of each of `buckets` contiguous, near-equal runs over n bars"""
+    return np.unique(np.linspace(0, n, min(buckets, n), endpoint=False).astype(int))
+
+
+def ohlc_buckets(open_, high, low, close, volume, buckets: int):
+    """
+    Merge consecutive bars into at most `buckets` candles: first open, highest
+    high, lowest low, last close and total volume of each run. Returns the
+    start index of each run and the merged columns.
+    """
+    starts = bucket_edges(len(close), buckets)
+    ends = np.append(starts[1:], len(close)) - 1
+    return starts, {
+        'open': np.asarray(open_)[starts],
+        'high': np.maximum.reduceat(high, starts),
+        'low': np.minimum.reduceat(low, starts),
+        'close': np.asarray(close)[ends],
+        'volume': np.add.reduceat(volume, starts)
+    }
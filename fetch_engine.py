@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+
+class FetchEngine:
+    """
+    One long-lived worker pool for all upstream fan-out. Every fetch, from
+    requests and the refresher alike, runs on the same `max_concurrency`
+    threads, so that is the global limit on upstream calls in flight, and
+    threads and the provider's HTTP session are reused across requests instead
+    of a new pool being built and torn down per call.
+    """
+
+    def __init__(self, max_concurrency: int = 16):
+        self.max_concurrency = max_concurrency
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._executor = None  # Created by the first submit(), so creating an engine costs nothing
+
+    def _mark_worker(self):
+        self._local.worker = True
+
+    def _call(self, fn, args):
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def submit(self, fn, *args) -> Future:
+        """
+        Schedule fn(*args); returns a concurrent.futures.Future.
+        Called from inside an engine task, fn runs inline so a nested fetch
+        can never wait on pool slots its own caller is holding.
+        """
+        if getattr(self._local, 'worker', False):
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                        thread_name_prefix='fetch', initializer=self._mark_worker)
+        return self._executor.submit(self._call, fn, args)
+
+    def stream(self, fn, items):
+        """
+        Yield (item, result) for fn(item) over all items as each completes.
+        A call that raises yields its exception as the result.
+        """
+        items = list(dict.fromkeys(items))
+        futures = {self.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+    def in_flight(self) -> int:
+        """Fetches currently running upstream"""
+        return self._in_flight
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import logging
+from typing import Callable, Optional
+
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+logger = logging.getLogger(__name__)
+
+BAR_DTYPE = [
+    ('ts', 'i8'),  # bar start, nanoseconds since epoch (UTC)
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8')
+]  # numpy structured dtype
+COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+
+class HistoryStore:
+    """
+    Persistent per-(symbol, interval) OHLCV bar store.
+    Bars live in one structured .npy file per series and are read back memory-mapped.
+    A series is downloaded in full once; after that only the tail since the last
+    stored bar is fetched, and only when the file is older than `max_age` seconds.
+    Bars are split- and dividend-adjusted, so when upstream re-adjusts a series
+    (its close for a stored bar changes) the whole series is downloaded again.
+
+    `fetcher(symbol, interval, period=None, start=None)` returns a yfinance-style
+    DataFrame (Open/High/Low/Close/Volume columns, DatetimeIndex).
+    `observe(source, seconds)`, if given, is called after every load.
+    """
+
+    def __init__(self, root: str, fetcher: Callable, max_age: float, tz: str = 'America/New_York',
+                 observe: Optional[Callable] = None):
+        self.root = root
+        self.fetcher = fetcher
+        self.max_age = max_age
+        self.tz = tz
+        self.observe = observe
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        # source -> [loads, total seconds, max seconds]; 'cold' = full download,
+        # 'tail' = local bars plus an incremental fetch, 'warm' = local bars only
+        self.timings = {'cold': [0, 0.0, 0.0], 'tail': [0, 0.0, 0.0], 'warm': [0, 0.0, 0.0]}
+        self._timings_lock = threading.Lock()
+
+    def _path(self, symbol: str, interval: str) -> str:
+        safe_symbol = ''.join(c if c.isalnum() or c in '-.' else '_' for c in symbol)
+        return os.path.join(self.root, f"{safe_symbol}_{interval}.npy")
+
+    def _lock(self, key) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _read(self, path: str) -> Optional[np.ndarray]:
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable history file {path}: {str(e)}")
+            return None
+
+    def _write(self, path: str, bars: np.ndarray):
+        os.makedirs(self.root, exist_ok=True)  # Created on first write, not when the store is built
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, bars)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _to_bars(hist: pd.DataFrame) -> np.ndarray:
+        hist = hist.dropna(subset=['Close'])
+        index = hist.index
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        bars = np.empty(len(hist), dtype=BAR_DTYPE)
+        bars['ts'] = index.tz_convert('UTC').asi8
+        for field, column in COLUMNS.items():
+            bars[field] = hist[column].to_numpy(dtype='f8')
+        return bars
+
+    def _to_frame(self, bars: np.ndarray) -> pd.DataFrame:
+        index = pd.DatetimeIndex(bars['ts'], tz='UTC').tz_convert(self.tz)
+        # Copy out of the memory map so the file can be replaced by the next tail update
+        return pd.DataFrame({column: np.array(bars[field]) for field, column in COLUMNS.items()},
+                            index=index)
+
+    def _record(self, source: str, elapsed: float):
+        with self._timings_lock:
+            timing = self.timings[source]
+            timing[0] += 1
+            timing[1] += elapsed
+            timing[2] = max(timing[2], elapsed)
+        if self.observe is not None:
+            self.observe(source, elapsed)
+
+    def _update(self, symbol: str, interval: str, period: str, bars: np.ndarray) -> tuple:
+        """(bars with the newest ones fetched, source)"""
+        # Overlap one complete bar: the newest stored one may have been partial, so
+        # only a changed close on the one before it means the series was re-adjusted
+        anchor = bars[-2] if len(bars) > 1 else bars[-1]
+        tail = self._to_bars(self.fetcher(symbol, interval, start=pd.Timestamp(int(anchor['ts']), tz='UTC')))
+        if len(tail) and tail['ts'][0] == anchor['ts'] and \
+                not np.isclose(tail['close'][0], anchor['close'], rtol=1e-4):
+            logger.info(f"{symbol} {interval} history was re-adjusted upstream; downloading it again")
+            full = self._to_bars(self.fetcher(symbol, interval, period=period))
+            return (full if len(full) else bars), 'cold'
+        if not len(tail):
+            return bars, 'tail'
+        return np.concatenate([bars[bars['ts'] < tail['ts'][0]], tail]), 'tail'
+
+    def get(self, symbol: str, interval: str, period: str, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Bars for symbol/interval, newest last, optionally sliced to those at or after `since`.
+        `period` is the window downloaded when the series is not stored yet.
+        """
+        started = time.perf_counter()
+        path = self._path(symbol, interval)
+        with self._lock((symbol, interval)):
+            bars = self._read(path)
+            if bars is None or not len(bars):
+                source = 'cold'
+                bars = self._to_bars(self.fetcher(symbol, interval, period=period))
+                if len(bars):
+                    self._write(path, bars)
+            elif time.time() - os.path.getmtime(path) > self.max_age:
+                try:
+                    updated, source = self._update(symbol, interval, period, bars)
+                except Exception as e:
+                    # Serve the stored bars; the next attempt waits another max_age
+                    logger.error(f"Error updating {symbol} {interval} history: {str(e)}")
+                    updated, source = bars, 'tail'
+                if updated is not bars:
+                    bars = updated
+                    self._write(path, bars)
+                else:
+                    os.utime(path)
+            else:
+                source = 'warm'
+            frame = self._to_frame(bars)
+
+        if since is not None:
+            frame = frame[frame.index >= since]
+        self._record(source, time.perf_counter() - started)
+        return frame
+
+    def stats(self) -> dict:
+        """Load counts and average/max latency in milliseconds for cold, tail and warm reads"""
+        with self._timings_lock:
+            timings = {source: list(timing) for source, timing in self.timings.items()}
+        return {
+            source: {
+                'loads': loads,
+                'avg_ms': round(total / loads * 1000, 2) if loads else 0.0,
+                'max_ms': round(worst * 1000, 2)
+            }
+            for source, (loads, total, worst) in timings.items()
+        }
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+SMA_LENGTHS = (20, 50, 200)
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+EMA_LENGTHS = (MACD_FAST, MACD_SLOW, 50)
+RSI_LENGTH = 14
+BOLLINGER_LENGTH = 20
+BOLLINGER_WIDTH = 2
+VWAP_LENGTH = 20  # Rolling window for daily and longer bars; intraday VWAP resets each session
+
+INPUT_COLUMNS = ['High', 'Low', 'Close', 'Volume']
+OUTPUT_COLUMNS = [f'sma_{n}' for n in SMA_LENGTHS] + [f'ema_{n}' for n in EMA_LENGTHS] + \
+    ['rsi', 'macd', 'macd_signal', 'macd_hist', 'bb_upper', 'bb_middle', 'bb_lower', 'vwap']
+# Running state carried between updates so new bars continue the recursions
+STATE_COLUMNS = ['avg_gain', 'avg_loss', 'cum_pv', 'cum_v']
+# Bars of history the rolling windows need ahead of the first new bar
+CONTEXT = max(SMA_LENGTHS + (BOLLINGER_LENGTH, VWAP_LENGTH)) - 1
+
+
+def _ewm(values: np.ndarray, seed: Optional[float], alpha: float) -> np.ndarray:
+    """Exponential average of values, continuing from `seed` (the previous bar's average) if given"""
+    if seed is None or np.isnan(seed):
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    if len(values) <= 32:
+        # A few new bars: the recursion directly is cheaper than setting up pandas
+        out = np.empty(len(values))
+        for i, value in enumerate(values):
+            seed = seed + alpha * (value - seed) if not np.isnan(value) else seed
+            out[i] = seed
+        return out
+    return pd.Series(np.concatenate([[seed], values])).ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+
+def _rolling(values: np.ndarray, length: int, count: int, reduce: str = 'mean') -> np.ndarray:
+    """`reduce` ('mean', 'std', 'sum') over the trailing `length` values for each of the last `count` positions"""
+    out = np.full(count, np.nan)
+    if len(values) >= length:
+        windows = np.lib.stride_tricks.sliding_window_view(values, length)[-count:]
+        out[count - len(windows):] = getattr(windows, reduce)(axis=1)
+    return out
+
+
+def _extend(bars: pd.DataFrame, context: pd.DataFrame, offset: int, intraday: bool) -> pd.DataFrame:
+    """
+    Indicators for `bars`, given `context`: the already-computed frame for the
+    bars just before them (empty when computing from scratch). `offset` is how
+    many bars precede `bars` in the series, for blanking out the RSI warm-up.
+    """
+    last = context.iloc[-1] if not context.empty else None
+    seed = (lambda column: last[column]) if last is not None else (lambda column: None)
+    high, low, close, volume = (bars[column].to_numpy() for column in INPUT_COLUMNS)
+    both = np.concatenate([context['Close'].to_numpy(), close])
+    count = len(bars)
+    out = {}
+
+    for n in SMA_LENGTHS:
+        out[f'sma_{n}'] = _rolling(both, n, count)
+    for n in EMA_LENGTHS:
+        out[f'ema_{n}'] = _ewm(close, seed(f'ema_{n}'), 2 / (n + 1))
+
+    # RSI with Wilder smoothing
+    delta = np.diff(both, prepend=np.nan)[-count:]
+    out['avg_gain'] = _ewm(np.clip(delta, 0, None), seed('avg_gain'), 1 / RSI_LENGTH)
+    out['avg_loss'] = _ewm(np.clip(-delta, 0, None), seed('avg_loss'), 1 / RSI_LENGTH)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.where(out['avg_loss'] == 0, 100.0, 100 - 100 / (1 + out['avg_gain'] / out['avg_loss']))
+    rsi[np.arange(offset, offset + count) < RSI_LENGTH] = np.nan
+    out['rsi'] = rsi
+
+    out['macd'] = out[f'ema_{MACD_FAST}'] - out[f'ema_{MACD_SLOW}']
+    out['macd_signal'] = _ewm(out['macd'], seed('macd_signal'), 2 / (MACD_SIGNAL + 1))
+    out['macd_hist'] = out['macd'] - out['macd_signal']
+
+    middle = _rolling(both, BOLLINGER_LENGTH, count)
+    width = BOLLINGER_WIDTH * _rolling(both, BOLLINGER_LENGTH, count, 'std')
+    out['bb_middle'] = middle
+    out['bb_upper'] = middle + width
+    out['bb_lower'] = middle - width
+
+    pv = (high + low + close) / 3 * volume
+    if intraday:
+        # Cumulative within each session, carrying on from the previous bar if it is the same day
+        day = bars.index.normalize()
+        out['cum_pv'] = pd.Series(pv).groupby(day).cumsum().to_numpy()
+        out['cum_v'] = pd.Series(volume).groupby(day).cumsum().to_numpy()
+        if last is not None and context.index[-1].normalize() == day[0]:
+            first_session = day == day[0]
+            out['cum_pv'][first_session] += last['cum_pv']
+            out['cum_v'][first_session] += last['cum_v']
+    else:
+        context_pv = (context['High'] + context['Low'] + context['Close']).to_numpy() / 3 * context['Volume'].to_numpy()
+        out['cum_pv'] = _rolling(np.concatenate([context_pv, pv]), VWAP_LENGTH, count, 'sum')
+        out['cum_v'] = _rolling(np.concatenate([context['Volume'].to_numpy(), volume]), VWAP_LENGTH, count, 'sum')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['vwap'] = np.where(out['cum_v'] > 0, out['cum_pv'] / out['cum_v'], np.nan)
+
+    inputs = {column: array for column, array in zip(INPUT_COLUMNS, (high, low, close, volume))}
+    return pd.DataFrame({**inputs, **out}, index=bars.index)
+
+
+def compute(bars: pd.DataFrame, previous: Optional[pd.DataFrame] = None, intraday: bool = False) -> pd.DataFrame:
+    """
+    Indicator frame for OHLCV `bars`. When `previous` (an earlier result for
+    the same series) starts on the same bar and covers a leading run of the
+    same bars, only the bars after it are computed, continuing from its last row.
+    The result always equals a fresh compute over `bars`.
+    """
+    bars = bars[INPUT_COLUMNS].astype('float64')
+    if previous is None or previous.empty or bars.empty:
+        empty = bars.iloc[:0].reindex(columns=INPUT_COLUMNS + OUTPUT_COLUMNS + STATE_COLUMNS)
+        return _extend(bars, empty, 0, intraday)
+
+    # EMA, RSI and MACD recurse from the first bar, so once a window slides past
+    # leading bars the previous state no longer matches a fresh compute
+    if previous.index[0] != bars.index[0]:
+        return compute(bars, None, intraday)
+    start = 0
+    overlap = min(len(previous), len(bars))
+    same = previous.index.asi8[start:start + overlap] == bars.index.asi8[:overlap]
+    for column in INPUT_COLUMNS:
+        same &= previous[column].to_numpy()[start:start + overlap] == bars[column].to_numpy()[:overlap]
+    reused = overlap if same.all() else int(np.argmin(same))
+    if reused == 0:
+        return compute(bars, None, intraday)
+
+    kept = previous.iloc[start:start + reused]
+    if reused == len(bars):
+        return kept
+    context = previous.iloc[max(start + reused - CONTEXT, 0):start + reused]
+    return pd.concat([kept, _extend(bars.iloc[reused:], context, reused, intraday)])
+
+
+def to_columns(frame: pd.DataFrame) -> dict:
+    """Indicator columns as lists of rounded floats (None during warm-up), aligned with the bars"""
+    columns = {}
+    for column in OUTPUT_COLUMNS:
+        values = frame[column].to_numpy().round(2)
+        columns[column] = np.where(np.isnan(values), None, values).tolist()
+    return columns
+
+
+class IndicatorCache:
+    """
+    Indicator results per (symbol, timeframe). A request whose bars end on the
+    same last bar as the cached result reuses its serialized output; newer bars
+    are computed incrementally on top of the cached frame.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.updates = 0
+        self._data = OrderedDict()  # (symbol, timeframe) -> (last bar key, frame, columns)
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, timeframe: str, bars: pd.DataFrame, intraday: bool = False) -> dict:
+        key = (symbol, timeframe)
+        last_bar = (bars.index[0], bars.index[-1], len(bars), float(bars['Close'].iloc[-1]))
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+        if entry is not None and entry[0] == last_bar:
+            self.hits += 1
+            return entry[2]
+
+        frame = compute(bars, entry[1] if entry is not None else None, intraday)
+        columns = to_columns(frame)
+        self.updates += 1
+        with self._lock:
+            self._data[key] = (last_bar, frame, columns)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return columns
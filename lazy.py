@@ -0,0 +1,21 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in for a heavy module (pandas, numpy, yfinance) that imports it on
+    first attribute access, so importing the app and starting a worker stay fast.
+    Module-level code must not touch it; only functions that run later.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)  # The import lock makes this thread-safe
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name!r}{' (loaded)' if self._module is not None else ''}>"
@@ -0,0 +1,69 @@
+import time
+
+
+def format_large_number(number: float) -> str:
+    """
+    Format large numbers into human-readable format with suffixes (K, M, B, T)
+    3430000000000 -> 3.43T
+    1234567890 -> 1.23B
+    1234567 -> 1.23M
+    12345 -> 12.3K
+    """
+    suffixes = ['', 'K', 'M', 'B', 'T']
+    sign = '-' if number < 0 else '' # Handle negative numbers
+    number = abs(number)
+
+    # Find the appropriate suffix
+    magnitude = 0
+    while number >= 1000 and magnitude < len(suffixes) - 1:
+        magnitude += 1
+        number /= 1000.0
+
+    return f"{sign}{number:.2f}{suffixes[magnitude]}"
+
+
+class Quote:
+    """
+    Latest quote for a symbol, kept as raw numbers.
+    Humanized strings (e.g. 3.43T) are produced at render time by the
+    large_number template filter or by to_dict() for JSON responses.
+    """
+    __slots__ = ('symbol', 'name', 'price', 'change', 'percent_change',
+                 'volume', 'market_cap', 'chart_data', 'updated_at', 'fetched_at')
+
+    def __init__(self, symbol: str, name: str, price: float, change: float, percent_change: float,
+                 volume: int, market_cap: float, chart_data: list, updated_at: str,
+                 fetched_at: float = None):
+        self.symbol = symbol
+        self.name = name
+        self.price = float(price)
+        self.change = float(change)
+        self.percent_change = float(percent_change)
+        self.volume = int(volume)
+        self.market_cap = float(market_cap or 0)
+        self.chart_data = chart_data
+        self.updated_at = updated_at
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()  # epoch seconds
+
+    def __repr__(self):
+        return f"Quote({self.symbol!r}, price={self.price}, percent_change={self.percent_change})"
+
+    def to_record(self) -> dict:
+        """Every field as plain values, for sharing the quote with other processes (Quote(**record))"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def to_dict(self) -> dict:
+        """JSON-ready representation, with display strings alongside the raw numbers"""
+        return {
+            'symbol': self.symbol,
+            'name': self.name,
+            'price': self.price,
+            'change': self.change,
+            'percent_change': self.percent_change,
+            'volume': self.volume,
+            'volume_display': format_large_number(self.volume),
+            'marketCap': self.market_cap,
+            'marketCap_display': format_large_number(self.market_cap),
+            'chart_data': self.chart_data,
+            'updated_at': self.updated_at
+        }
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+import zlib
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+logger = logging.getLogger(__name__)
+
+NY_TZ = 'America/New_York'
+INTRADAY_STEPS = {'1m': '1min', '2m': '2min', '5m': '5min', '15m': '15min', '30m': '30min',
+                  '60m': '60min', '1h': '60min', '90m': '90min'}
+# Period -> trading sessions (for the short intraday periods) or calendar lookback
+PERIOD_SESSIONS = {'1d': 1, '5d': 5}
+PERIOD_LOOKBACK = {'1mo': {'months': 1}, '3mo': {'months': 3}, '6mo': {'months': 6},
+                   '1y': {'years': 1}, '2y': {'years': 2}, '5y': {'years': 5},
+                   '10y': {'years': 10}, 'max': {'years': 20}}  # pd.DateOffset arguments
+# yf.download keeps its results in module globals that each call resets, so
+# overlapping downloads can lose each other's tickers or wait forever
+_download_lock = threading.Lock()
+
+
+class MarketDataProvider(ABC):
+    """
+    Where quotes, bars, fundamentals and news come from.
+    Bars are yfinance-style DataFrames: Open/High/Low/Close/Volume columns
+    on a tz-aware DatetimeIndex. Info and news are yfinance-style dicts.
+    """
+
+    @abstractmethod
+    def history(self, symbol: str, period: str = None, interval: str = '1d', start=None) -> pd.DataFrame:
+        """Bars for one symbol: a full `period`, or everything since `start`"""
+
+    def batch_history(self, symbols: list, period: str, interval: str) -> dict:
+        """Bars for many symbols in one call, keyed by symbol (failed symbols omitted)"""
+        histories = {}
+        for symbol in symbols:
+            hist = self.history(symbol, period=period, interval=interval)
+            if not hist.empty:
+                histories[symbol] = hist
+        return histories
+
+    @abstractmethod
+    def info(self, symbol: str) -> dict:
+        """Fundamentals for one symbol"""
+
+    @abstractmethod
+    def news(self, symbol: str) -> list:
+        """Recent news items for one symbol"""
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Live data from Yahoo Finance. A batch download still sends one chart request
+    per ticker, on yfinance's own threads; `max_threads` caps how many run at once.
+    """
+
+    def __init__(self, max_threads: int = 16):
+        self.yf = LazyModule('yfinance')
+        self.max_threads = max_threads
+
+    def history(self, symbol, period=None, interval='1d', start=None):
+        stock = self.yf.Ticker(symbol)
+        if start is not None:
+            return stock.history(start=start, interval=interval)
+        return stock.history(period=period, interval=interval)
+
+    def batch_history(self, symbols, period, interval):
+        with _download_lock:
+            frame = self.yf.download(symbols, period=period, interval=interval, group_by='ticker',
+                                     auto_adjust=True, threads=min(len(symbols), self.max_threads),
+                                     progress=False)
+        histories = {}
+        if frame is None or frame.empty:
+            return histories
+        for symbol in symbols:
+            if symbol not in frame.columns.get_level_values(0):
+                continue
+            hist = frame[symbol].dropna(subset=['Close'])
+            if not hist.empty:
+                histories[symbol] = hist
+        return histories
+
+    def info(self, symbol):
+        return self.yf.Ticker(symbol).info or {}
+
+    def news(self, symbol):
+        return self.yf.Ticker(symbol).news or []
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Offline, deterministic data for load tests and profiling.
+    Recorded responses under `record_dir` (see RecordingProvider) are replayed when
+    present; anything else is synthesized from the symbol and bar timestamps, so the
+    same bar always has the same prices. Every call sleeps `latency` seconds to
+    stand in for the network round trip; a batch costs one round trip per symbol,
+    run `max_threads` at a time and one batch at a time, as with yfinance.
+    """
+
+    def __init__(self, latency: float = 0.0, record_dir: Optional[str] = None, max_threads: int = 16):
+        self.latency = latency
+        self.record_dir = record_dir
+        self.max_threads = max_threads
+
+    def _wait(self, round_trips: int = 1):
+        if self.latency:
+            time.sleep(self.latency * round_trips)
+
+    def _recorded(self, name: str):
+        if not self.record_dir:
+            return None
+        path = os.path.join(self.record_dir, name)
+        if not os.path.exists(path):
+            return None
+        if name.endswith('.json'):
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        hist = pd.read_csv(path, index_col=0)
+        hist.index = pd.to_datetime(hist.index, utc=True).tz_convert(NY_TZ)
+        return hist
+
+    @staticmethod
+    def _seed(symbol: str) -> int:
+        return zlib.crc32(symbol.encode())
+
+    @staticmethod
+    def _timestamps(interval: str, period: Optional[str], start) -> pd.DatetimeIndex:
+        now = pd.Timestamp.now(tz=NY_TZ)
+        today = now.normalize()
+        if start is not None:
+            start = pd.Timestamp(start)
+            start = start.tz_localize(NY_TZ) if start.tz is None else start.tz_convert(NY_TZ)
+            first_day = start.normalize()
+        elif period in PERIOD_SESSIONS:
+            sessions = pd.bdate_range(end=today.tz_localize(None), periods=PERIOD_SESSIONS[period] + 1)
+            # Today only counts once its session has started
+            if sessions[-1] == today.tz_localize(None) and now.time() < pd.Timestamp('09:30').time():
+                sessions = sessions[:-1]
+            else:
+                sessions = sessions[1:]
+            first_day = sessions[0].tz_localize(NY_TZ)
+        else:
+            first_day = today - pd.DateOffset(**PERIOD_LOOKBACK.get(period, {'years': 1}))
+
+        if interval in INTRADAY_STEPS:
+            days = pd.bdate_range(first_day.tz_localize(None), today.tz_localize(None))
+            offsets = pd.timedelta_range('09:30:00', '15:59:59', freq=INTRADAY_STEPS[interval])
+            stamps = (days.values[:, None] + offsets.values[None, :]).ravel()
+            index = pd.DatetimeIndex(stamps).tz_localize(NY_TZ)
+        elif interval == '1wk':
+            index = pd.date_range(first_day, today, freq='W-MON')
+        elif interval == '1mo':
+            index = pd.date_range(first_day, today, freq='MS')
+        else:
+            index = pd.bdate_range(first_day, today).tz_localize(None).tz_localize(NY_TZ)
+        return index[index <= now]
+
+    def _synthesize(self, symbol: str, index: pd.DatetimeIndex) -> pd.DataFrame:
+        seed = self._seed(symbol)
+        base = 20 + seed % 480
+        t = index.asi8 // 60_000_000_000  # minutes since epoch
+        # Smooth drift plus per-bar noise hashed from the timestamp: no state, fully repeatable
+        noise = ((t * 2654435761 + seed) % 2**32) / 2**32 - 0.5
+        close = base * (1 + 0.15 * np.sin(t / 90_000 + seed % 7) + 0.03 * np.sin(t / 700 + seed % 5)
+                        + 0.004 * noise)
+        spread = base * 0.002 * (1 + np.abs(noise))
+        open_ = close - spread * np.sign(noise)
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) + spread,
+            'Low': np.minimum(open_, close) - spread,
+            'Close': close,
+            'Volume': (1_000 + (seed + t) % 50_000 * 10).astype('int64')
+        }, index=index)
+
+    def _history(self, symbol, period, interval, start):
+        recorded = self._recorded(f"{symbol}_{interval}.csv")
+        if recorded is not None:
+            return recorded if start is None else recorded[recorded.index >= start]
+        return self._synthesize(symbol, self._timestamps(interval, period, start))
+
+    def history(self, symbol, period=None, interval='1d', start=None):
+        self._wait()
+        return self._history(symbol, period, interval, start)
+
+    def batch_history(self, symbols, period, interval):
+        with _download_lock:
+            self._wait(math.ceil(len(symbols) / self.max_threads))
+        return {symbol: self._history(symbol, period, interval, None) for symbol in symbols}
+
+    def info(self, symbol):
+        self._wait()
+        recorded = self._recorded(f"{symbol}_info.json")
+        if recorded is not None:
+            return recorded
+        seed = self._seed(symbol)
+        price = 20 + seed % 480
+        return {
+            'longName': f"{symbol} Holdings Inc.",
+            'marketCap': float(price * (50_000_000 + seed % 5_000_000_000)),
+            'forwardPE': round(5 + seed % 4000 / 100, 2),
+            'trailingEps': round(price / (5 + seed % 40), 2),
+            'beta': round(0.5 + seed % 150 / 100, 2),
+            'dividendYield': round(seed % 400 / 10000, 4) or None,
+            'fiftyTwoWeekHigh': round(price * 1.2, 2),
+            'fiftyTwoWeekLow': round(price * 0.8, 2)
+        }
+
+    def news(self, symbol):
+        self._wait()
+        recorded = self._recorded(f"{symbol}_news.json")
+        if recorded is not None:
+            return recorded
+        published = int(time.time()) // 3600 * 3600
+        return [{
+            'title': f"{symbol} headline {i + 1}",
+            'publisher': 'Replay Wire',
+            'link': f"https://example.com/{symbol.lower()}/{i + 1}",
+            'providerPublishTime': published - i * 3600,
+            'summary': f"Synthetic news item {i + 1} for {symbol}."
+        } for i in range(5)]
+
+
+class RecordingProvider(MarketDataProvider):
+    """Passes calls through to another provider and saves responses for ReplayProvider"""
+
+    def __init__(self, inner: MarketDataProvider, record_dir: str):
+        self.inner = inner
+        self.record_dir = record_dir
+        os.makedirs(record_dir, exist_ok=True)
+
+    def _save(self, name: str, data):
+        path = os.path.join(self.record_dir, name)
+        if isinstance(data, pd.DataFrame):
+            data.to_csv(path)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, default=str)
+
+    def history(self, symbol, period=None, interval='1d', start=None):
+        hist = self.inner.history(symbol, period=period, interval=interval, start=start)
+        if start is None and not hist.empty:
+            self._save(f"{symbol}_{interval}.csv", hist)
+        return hist
+
+    def batch_history(self, symbols, period, interval):
+        histories = self.inner.batch_history(symbols, period, interval)
+        for symbol, hist in histories.items():
+            self._save(f"{symbol}_{interval}.csv", hist)
+        return histories
+
+    def info(self, symbol):
+        info = self.inner.info(symbol)
+        self._save(f"{symbol}_info.json", info)
+        return info
+
+    def news(self, symbol):
+        news = self.inner.news(symbol)
+        self._save(f"{symbol}_news.json", news)
+        return news
+
+
+class InstrumentedProvider(MarketDataProvider):
+    """Times every call made through another provider and reports it to `observe(call, seconds, ok)`"""
+
+    def __init__(self, inner: MarketDataProvider, observe):
+        self.inner = inner
+        self.observe = observe
+
+    def _timed(self, call: str, method, *args, **kwargs):
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = method(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            self.observe(call, time.perf_counter() - started, ok)
+
+    def history(self, symbol, period=None, interval='1d', start=None):
+        return self._timed('history', self.inner.history, symbol, period=period, interval=interval, start=start)
+
+    def batch_history(self, symbols, period, interval):
+        return self._timed('batch_history', self.inner.batch_history, symbols, period, interval)
+
+    def info(self, symbol):
+        return self._timed('info', self.inner.info, symbol)
+
+    def news(self, symbol):
+        return self._timed('news', self.inner.news, symbol)
+
+
+def create_provider(name: str, latency: float = 0.0, record_dir: Optional[str] = None,
+                    max_threads: int = 16) -> MarketDataProvider:
+    """Provider by name: 'yfinance', 'replay' or 'record' (yfinance, saving responses to record_dir)"""
+    if name == 'replay':
+        return ReplayProvider(latency=latency, record_dir=record_dir, max_threads=max_threads)
+    if name == 'record':
+        return RecordingProvider(YFinanceProvider(max_threads), record_dir or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'cache', 'recorded'))
+    if name != 'yfinance':
+        logger.warning(f"Unknown data provider {name!r}, using yfinance")
+    return YFinanceProvider(max_threads)
@@ -0,0 +1,209 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import time as datetime_time
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+NY_TZ = pytz.timezone('America/New_York')
+MARKET_OPEN = datetime_time(9, 30)
+MARKET_CLOSE = datetime_time(16, 0)
+
+
+def seconds_until_market_open(now: float) -> float:
+    """Seconds from epoch time `now` until the next weekday 9:30 AM New York time (0 if open)"""
+    current = datetime.fromtimestamp(now, NY_TZ)
+    if current.weekday() < 5 and MARKET_OPEN <= current.time() <= MARKET_CLOSE:
+        return 0.0
+    day = current.date()
+    if current.time() > MARKET_OPEN:
+        day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    next_open = NY_TZ.localize(datetime.combine(day, MARKET_OPEN))
+    return max(next_open.timestamp() - now, 0.0)
+
+
+def last_market_close(now: float) -> float:
+    """Epoch time of the latest weekday 4:00 PM New York close at or before epoch time `now`"""
+    current = datetime.fromtimestamp(now, NY_TZ)
+    day = current.date()
+    if current.weekday() >= 5 or current.time() < MARKET_CLOSE:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return NY_TZ.localize(datetime.combine(day, MARKET_CLOSE)).timestamp()
+
+
+class RefreshScheduler:
+    """
+    Decides which symbols the background refresher fetches and when.
+    A heap holds each tracked symbol's next due time. Symbols refresh every
+    `hot_interval` while pinned hot, streamed to a client or requested within
+    `hot_window`, and every `cold_interval` otherwise. Unpinned symbols nobody
+    has requested for `expire_after` seconds are dropped, and so are unpinned
+    symbols whose last `max_failures` refreshes all failed (e.g. made-up tickers);
+    those are ignored by touch() for `expire_after` seconds. While the market is
+    closed a symbol gets one refresh (the close) and then waits for the next open.
+    """
+
+    def __init__(self, hot_interval: float, cold_interval: float, hot_window: float,
+                 expire_after: float, max_failures: int = 3, clock=time.time):
+        self.hot_interval = hot_interval
+        self.cold_interval = cold_interval
+        self.hot_window = hot_window
+        self.expire_after = expire_after
+        self.max_failures = max_failures
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._heap = []  # (due time, symbol); stale entries are skipped on pop
+        self._due = {}  # symbol -> current due time
+        self._pinned = {}  # symbol -> True if always hot, False if always tracked but cold
+        self._last_requested = {}  # symbol -> epoch seconds
+        self._failures = {}  # symbol -> (consecutive failed refreshes, epoch seconds of the last one)
+        self.wakeup = threading.Event()  # set when a symbol becomes due immediately
+        self.last_lag = 0.0  # how overdue the most overdue symbol was at the last pop_due()
+
+    def _schedule(self, symbol: str, due: float):
+        self._due[symbol] = due
+        heapq.heappush(self._heap, (due, symbol))
+
+    def pin(self, symbols, hot: bool = True):
+        """Track symbols permanently, e.g. the dashboard (hot) or the screener universe (cold)"""
+        now = self.clock()
+        with self._lock:
+            for symbol in symbols:
+                self._pinned[symbol] = self._pinned.get(symbol, False) or hot
+                if symbol not in self._due:
+                    self._schedule(symbol, now)
+        self.wakeup.set()
+
+    def touch(self, symbols):
+        """Record that users asked for these symbols; new ones become due right away"""
+        now = self.clock()
+        added = False
+        with self._lock:
+            for symbol in symbols:
+                if self._failing(symbol, now):
+                    continue
+                self._last_requested[symbol] = now
+                if symbol not in self._due:
+                    self._schedule(symbol, now)
+                    added = True
+        if added:
+            self.wakeup.set()
+
+    def _failing(self, symbol: str, now: float) -> bool:
+        failures, last_failed = self._failures.get(symbol, (0, 0.0))
+        if failures < self.max_failures or self._pinned.get(symbol) is not None:
+            return False
+        if now - last_failed > self.expire_after:
+            del self._failures[symbol]  # Give it another chance
+            return False
+        return True
+
+    def record_results(self, succeeded, failed):
+        """Note which refreshed symbols got a quote; unpinned ones that keep failing stop being tracked"""
+        now = self.clock()
+        with self._lock:
+            for symbol in succeeded:
+                self._failures.pop(symbol, None)
+            for symbol in failed:
+                count = self._failures.get(symbol, (0, 0.0))[0] + 1
+                self._failures[symbol] = (count, now)
+                if self._failing(symbol, now):
+                    self._due.pop(symbol, None)  # Its heap entry is skipped as stale
+                    self._last_requested.pop(symbol, None)
+
+    def _interval(self, symbol: str, now: float, watched) -> float:
+        """Seconds until symbol's next refresh, or None to stop tracking it"""
+        last_requested = self._last_requested.get(symbol, float('-inf'))
+        pinned = self._pinned.get(symbol)
+        if pinned or symbol in watched or now - last_requested <= self.hot_window:
+            interval = self.hot_interval
+        elif pinned is not None or now - last_requested <= self.expire_after:
+            interval = self.cold_interval
+        else:
+            self._last_requested.pop(symbol, None)
+            return None
+        # Just refreshed with the market closed: that was the close, so wait for the open
+        return max(interval, seconds_until_market_open(now))
+
+    def pop_due(self, watched=()) -> list:
+        """Symbols due for a refresh now; each is rescheduled (or dropped) as it is popped"""
+        now = self.clock()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                when, symbol = heapq.heappop(self._heap)
+                if self._due.get(symbol) != when:
+                    continue
+                if not due:
+                    self.last_lag = now - when
+                interval = self._interval(symbol, now, watched)
+                if interval is None:
+                    del self._due[symbol]
+                    continue
+                due.append(symbol)
+                self._schedule(symbol, now + interval)
+        return due
+
+    def seconds_until_due(self) -> float:
+        """Time until the next symbol is due (inf if nothing is tracked)"""
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return float('inf')
+            return max(self._heap[0][0] - self.clock(), 0.0)
+
+    def tracked(self) -> int:
+        with self._lock:
+            return len(self._due)
+
+
+class Backfill:
+    """
+    Fetches data missing for some symbols a few at a time: up to `batch_size`
+    per batch, a new batch only once the last one finished and `interval`
+    seconds passed. A symbol whose fetch failed is skipped for `retry_after`
+    seconds, and a batch that failed outright (e.g. rate limited) pauses the
+    backfill that long. Driven from a single thread.
+    """
+
+    def __init__(self, submit, batch_size: int, interval: float, retry_after: float, clock=time.time):
+        self.submit = submit  # symbol -> Future of its fetch
+        self.batch_size = batch_size
+        self.interval = interval
+        self.retry_after = retry_after
+        self.clock = clock
+        self._batch = {}  # symbol -> Future, for the batch in flight
+        self._started_at = float('-inf')
+        self._paused_until = 0.0
+        self._failed = {}  # symbol -> epoch seconds of its failed fetch
+
+    def run(self, missing) -> list:
+        """Start the next batch from `missing` (symbols still lacking data) if one is due; returns its symbols"""
+        now = self.clock()
+        if now - self._started_at < self.interval or now < self._paused_until or \
+                not all(future.done() for future in self._batch.values()):
+            return []
+        errors = [symbol for symbol, future in self._batch.items() if future.exception() is not None]
+        for symbol in errors:
+            self._failed[symbol] = now
+        if errors and len(errors) == len(self._batch):
+            logger.warning(f"Backfill failed for {', '.join(errors)}; pausing it")
+            self._batch = {}
+            self._paused_until = now + self.retry_after
+            return []
+        for symbol, failed_at in list(self._failed.items()):
+            if now - failed_at > self.retry_after:
+                del self._failed[symbol]
+        batch = [symbol for symbol in missing if symbol not in self._failed][:self.batch_size]
+        self._batch = {symbol: self.submit(symbol) for symbol in batch}
+        self._started_at = now
+        return batch
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import ast
+import functools
+import math
+import operator
+import re
+import threading
+
+from lazy import LazyModule
+
+np = LazyModule('numpy')
+
+MAX_EXPRESSION_LENGTH = 500
+
+# 10B -> 10000000000.0; applied to the expression text before parsing
+_SUFFIXES = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+_SUFFIXED_NUMBER = re.compile(r'(?<![\w.])(\d+(?:\.\d*)?|\.\d+)([KMBT])\b')
+_KEYWORDS = re.compile(r'\b(AND|OR|NOT)\b', re.IGNORECASE)
+
+_COMPARISONS = {ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt, ast.LtE: operator.le,
+                ast.Eq: operator.eq, ast.NotEq: operator.ne}
+_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+class ScreenError(ValueError):
+    """A filter or sort expression that can't be evaluated; the message is safe to show users"""
+
+
+def _build(node, fields: tuple):
+    """Turn an expression node into a function of {field: column array}"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        value = float(node.value)
+        return lambda columns: value
+    if isinstance(node, ast.Name):
+        if node.id not in fields:
+            raise ScreenError(f"Unknown field {node.id!r} (fields: {', '.join(fields)})")
+        name = node.id
+        return lambda columns: columns[name]
+    if isinstance(node, ast.BoolOp):
+        parts = [_build(value, fields) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return lambda columns: functools.reduce(combine, (part(columns) for part in parts))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub, ast.UAdd)):
+        operand = _build(node.operand, fields)
+        if isinstance(node.op, ast.Not):
+            # NaN fails the negated comparison too: not forwardPE < 20 skips symbols without a P/E
+            names = sorted({name.id for name in ast.walk(node.operand) if isinstance(name, ast.Name)})
+            return lambda columns: functools.reduce(
+                np.logical_and, [np.logical_not(operand(columns))] + [~np.isnan(columns[name]) for name in names])
+        if isinstance(node.op, ast.USub):
+            return lambda columns: -operand(columns)
+        return operand
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        left, right, op = _build(node.left, fields), _build(node.right, fields), _ARITHMETIC[type(node.op)]
+        return lambda columns: op(left(columns), right(columns))
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        # a < b < c means a < b and b < c
+        operands = [_build(operand, fields) for operand in [node.left] + node.comparators]
+        ops = [_COMPARISONS[type(op)] for op in node.ops]
+
+        def compare(columns):
+            values = [operand(columns) for operand in operands]
+            return functools.reduce(np.logical_and, (op(values[i], values[i + 1]) for i, op in enumerate(ops)))
+        return compare
+    raise ScreenError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+@functools.lru_cache(maxsize=256)
+def compile_expression(text: str, fields: tuple):
+    """
+    Compile a filter or sort expression over `fields`, e.g.
+    "percent_change > 2 and forwardPE < 20 and marketCap > 10B".
+    Supports comparisons, and/or/not, + - * / and K/M/B/T number suffixes.
+    Returns a function of {field: column array} evaluated with whole-column NumPy operations.
+    """
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ScreenError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    source = _SUFFIXED_NUMBER.sub(lambda m: repr(float(m.group(1)) * _SUFFIXES[m.group(2)]), text.strip())
+    source = _KEYWORDS.sub(lambda m: m.group(1).lower(), source)
+    try:
+        tree = ast.parse(source, mode='eval')
+    except SyntaxError:
+        raise ScreenError(f"Can't parse expression: {text}")
+    return _build(tree.body, fields)
+
+
+class ScreenTable:
+    """
+    Latest numbers for every symbol in the screening universe, one NumPy column
+    per field, updated in place as quotes and fundamentals arrive. Screens run
+    over whole columns at once, so filtering and sorting thousands of symbols
+    takes a few milliseconds and never goes upstream. Missing values are NaN,
+    which fail every comparison, negated or not: a symbol without a P/E passes
+    neither forwardPE < 20 nor not forwardPE < 20. Given `universe`, updates
+    for any other symbol are ignored.
+    """
+
+    def __init__(self, fields, capacity: int = 1024, universe=None):
+        self.fields = tuple(fields)
+        self.universe = frozenset(universe) if universe is not None else None
+        self._field_rows = {field: i for i, field in enumerate(self.fields)}
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._rows = {}  # symbol -> column position
+        self._symbols = []  # column position -> symbol
+        self._names = []  # column position -> company name
+        self._data = None  # (fields, capacity) float array; allocated on first update
+
+    def _row(self, symbol: str) -> int:
+        row = self._rows.get(symbol)
+        if row is None:
+            row = len(self._symbols)
+            if self._data is None or row == self._data.shape[1]:
+                grown = np.full((len(self.fields), max(self._capacity, 2 * row)), np.nan)
+                if self._data is not None:
+                    grown[:, :row] = self._data
+                self._data = grown
+            self._rows[symbol] = row
+            self._symbols.append(symbol)
+            self._names.append(symbol)
+        return row
+
+    def update(self, symbol: str, values: dict, name: str = None):
+        """Set the given fields for a symbol; unknown fields are ignored and non-numbers stored as NaN"""
+        if self.universe is not None and symbol not in self.universe:
+            return
+        with self._lock:
+            row = self._row(symbol)
+            for field, value in values.items():
+                index = self._field_rows.get(field)
+                if index is not None:
+                    numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+                    self._data[index, row] = value if numeric else np.nan
+            if name:
+                self._names[row] = name
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def screen(self, where: str = None, sort: str = 'marketCap', descending: bool = True,
+               offset: int = 0, limit: int = 50) -> tuple:
+        """
+        (number of matching symbols, one page of them as dicts) for a filter expression,
+        ordered by a sort expression (missing values last). Raises ScreenError for bad expressions.
+        """
+        condition = compile_expression(where, self.fields) if where else None
+        key = compile_expression(sort, self.fields)
+        with self._lock:
+            count = len(self._symbols)
+            if not count:
+                return 0, []
+            columns = {field: self._data[i, :count] for i, field in enumerate(self.fields)}
+            with np.errstate(all='ignore'):
+                try:
+                    matched = np.arange(count) if condition is None else \
+                        np.flatnonzero(np.broadcast_to(condition(columns), count))
+                    keys = np.broadcast_to(np.asarray(key(columns), dtype=float), count)[matched]
+                except (TypeError, ValueError) as e:
+                    raise ScreenError(f"Can't evaluate expression: {str(e)}")
+            order = np.argsort(-keys if descending else keys, kind='stable')  # NaN sorts last either way
+            page = matched[order[offset:offset + limit]]
+            rows = self._data[:, page].T.tolist()
+            results = [
+                dict({'symbol': self._symbols[row], 'name': self._names[row]},
+                     **{field: None if math.isnan(value) else value for field, value in zip(self.fields, values)})
+                for row, values in zip(page.tolist(), rows)
+            ]
+        return len(matched), results
@@ -0,0 +1,214 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+class SharedQuoteStore:
+    """
+    Quotes shared by every worker process on a host, in a SQLite file.
+    WAL mode lets any number of workers read while one writes, and reads go
+    through a memory map. Each write bumps a store-wide version so workers
+    can pull just what changed since their last sync. The same file holds a
+    lease that elects one worker as the refresher, the symbols users have
+    asked for (and whose detail pages they viewed) on any worker so the
+    refresher knows to track them, and fetched fundamentals and news. The file outlives the workers, so a restarted
+    worker boots from whatever the last run left in it.
+
+    Nothing touches the file until first use, and connections and the lease
+    owner id belong to the process that made them, so a store created before
+    a fork (e.g. gunicorn --preload) gives each worker its own.
+    """
+
+    def __init__(self, path: str, lease_ttl: float, mmap_size: int = 64 * 1024 * 1024):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self.mmap_size = mmap_size
+        self._owner = (None, None)  # (pid, owner id)
+        self._local = threading.local()
+        self._schema_pid = None  # Process that last made sure the tables exist
+        self._schema_lock = threading.Lock()
+        self._demand = set()  # Symbols requested here since the last flush_demand()
+        self._views = {}  # Detail pages viewed here since the last flush_demand(): symbol -> time
+        self._demand_lock = threading.Lock()
+
+    @property
+    def owner(self) -> str:
+        """Lease owner id of this process"""
+        pid, owner = self._owner
+        if pid != os.getpid():
+            owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._owner = (os.getpid(), owner)
+        return owner
+
+    def _create_schema(self, db: sqlite3.Connection):
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS quotes (
+                symbol TEXT PRIMARY KEY, record TEXT NOT NULL, version INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS quotes_version ON quotes (version);
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS demand (
+                symbol TEXT PRIMARY KEY, requested_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS demand_requested_at ON demand (requested_at);
+            CREATE TABLE IF NOT EXISTS fundamentals (
+                symbol TEXT PRIMARY KEY, info TEXT NOT NULL, fetched_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS news (
+                symbol TEXT PRIMARY KEY, items TEXT NOT NULL, fetched_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS views (
+                symbol TEXT PRIMARY KEY, viewed_at REAL NOT NULL);
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        This thread's connection (sqlite3 connections are not shared between threads,
+        nor across fork(): one inherited from the parent process is never used)
+        """
+        pid = os.getpid()
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != pid:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            with self._schema_lock:
+                if self._schema_pid != pid:
+                    self._create_schema(db)
+                    self._schema_pid = pid
+            self._local.db, self._local.pid = db, pid
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front so writers queue instead of failing"""
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def put_many(self, records: dict) -> int:
+        """Store {symbol: record dict} in one transaction; returns the version written"""
+        with self._transaction() as db:
+            version = db.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM quotes").fetchone()[0]
+            db.executemany("INSERT OR REPLACE INTO quotes (symbol, record, version) VALUES (?, ?, ?)",
+                           [(symbol, json.dumps(record), version) for symbol, record in records.items()])
+        return version
+
+    def changed_since(self, version: int) -> tuple:
+        """(latest version, {symbol: record dict} written after `version`)"""
+        rows = self._connection().execute(
+            "SELECT symbol, record, version FROM quotes WHERE version > ?", (version,)).fetchall()
+        records = {symbol: json.loads(record) for symbol, record, _ in rows}
+        return max((row[2] for row in rows), default=version), records
+
+    def acquire_lease(self, name: str = 'refresher') -> bool:
+        """Take or renew the named lease; True while this process holds it"""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("INSERT OR IGNORE INTO leases (name, owner, expires_at) VALUES (?, ?, 0)", (name, self.owner))
+            taken = db.execute("UPDATE leases SET owner = ?, expires_at = ? "
+                               "WHERE name = ? AND (owner = ? OR expires_at < ?)",
+                               (self.owner, now + self.lease_ttl, name, self.owner, now)).rowcount
+        return taken == 1
+
+    def release_lease(self, name: str = 'refresher'):
+        self._connection().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+    def record_demand(self, symbols):
+        """Note symbols requested on this worker; written out by flush_demand()"""
+        with self._demand_lock:
+            self._demand.update(symbols)
+
+    def record_view(self, symbol: str):
+        """Note a detail page view on this worker; written out by flush_demand()"""
+        with self._demand_lock:
+            self._views[symbol] = time.time()
+
+    def flush_demand(self):
+        """Write out symbols requested since the last flush, stamped with the current time, and page views"""
+        with self._demand_lock:
+            symbols, self._demand = self._demand, set()
+            views, self._views = self._views, {}
+        if symbols or views:
+            now = time.time()
+            with self._transaction() as db:
+                db.executemany("INSERT OR REPLACE INTO demand (symbol, requested_at) VALUES (?, ?)",
+                               [(symbol, now) for symbol in symbols])
+                db.executemany("INSERT INTO views (symbol, viewed_at) VALUES (?, ?) ON CONFLICT (symbol) "
+                               "DO UPDATE SET viewed_at = MAX(viewed_at, excluded.viewed_at)", list(views.items()))
+
+    def demand_since(self, since: float, expire_before: float) -> list:
+        """Symbols requested on any worker after `since`; forgets requests older than `expire_before`"""
+        db = self._connection()
+        db.execute("DELETE FROM demand WHERE requested_at < ?", (expire_before,))
+        return [row[0] for row in db.execute("SELECT symbol FROM demand WHERE requested_at > ?", (since,))]
+
+    def put_fundamentals(self, entries: dict):
+        """Store {symbol: (info dict, fetched_at)}, keeping whichever copy of a symbol was fetched last"""
+        with self._transaction() as db:
+            db.executemany("INSERT INTO fundamentals (symbol, info, fetched_at) VALUES (?, ?, ?) "
+                           "ON CONFLICT (symbol) DO UPDATE SET info = excluded.info, fetched_at = excluded.fetched_at "
+                           "WHERE excluded.fetched_at > fundamentals.fetched_at",
+                           [(symbol, json.dumps(info), fetched_at) for symbol, (info, fetched_at) in entries.items()])
+
+    def load_fundamentals(self, since: float) -> dict:
+        """{symbol: (info dict, fetched_at)} for fundamentals fetched after `since`"""
+        rows = self._connection().execute(
+            "SELECT symbol, info, fetched_at FROM fundamentals WHERE fetched_at > ?", (since,)).fetchall()
+        return {symbol: (json.loads(info), fetched_at) for symbol, info, fetched_at in rows}
+
+    def recently_viewed(self, since: float, limit: int) -> list:
+        """Up to `limit` symbols whose detail pages were viewed on any worker after `since`, latest first"""
+        db = self._connection()
+        db.execute("DELETE FROM views WHERE viewed_at <= ?", (since,))
+        return [row[0] for row in db.execute("SELECT symbol FROM views ORDER BY viewed_at DESC LIMIT ?", (limit,))]
+
+    def put_news(self, symbol: str, items: list, fetched_at: float):
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO news (symbol, items, fetched_at) VALUES (?, ?, ?)",
+                       (symbol, json.dumps(items), fetched_at))
+
+    def load_news(self, symbol: str):
+        """(news items, fetched_at) stored for a symbol, or None"""
+        row = self._connection().execute("SELECT items, fetched_at FROM news WHERE symbol = ?", (symbol,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+
+class FundamentalsSnapshot:
+    """
+    Copies newly fetched fundamentals into a SharedQuoteStore every `interval`
+    seconds, so the next run and the other workers start with them.
+    """
+
+    def __init__(self, store: SharedQuoteStore, interval: float, clock=time.time):
+        self.store = store
+        self.interval = interval
+        self.clock = clock
+        self.covered = 0.0  # Fetch time of the newest fundamentals already in the store
+        self._written_at = 0.0
+
+    def due(self) -> bool:
+        return self.clock() - self._written_at >= self.interval
+
+    def write(self, fetched_at: dict, lookup) -> int:
+        """Store fundamentals fetched after `covered`, given {symbol: fetched_at} and lookup(symbol) -> info"""
+        since = self.covered
+        fresh = {symbol: at for symbol, at in fetched_at.items() if at > since}
+        entries = {symbol: (lookup(symbol), at) for symbol, at in fresh.items()}
+        entries = {symbol: entry for symbol, entry in entries.items() if entry[0] is not None}
+        if entries:
+            self.store.put_fundamentals(entries)
+        self.covered = max(fresh.values(), default=since)
+        self._written_at = self.clock()
+        return len(entries)
@@ -68,33 +68,31 @@ document.addEventListener('DOMContentLoaded', function() {
         ctx.fill();
     }
 
-    // Start real-time updates
+    // Start real-time updates: one Server-Sent Events stream for every card on the page
     function startRealTimeUpdates() {
-        setInterval(() => {
-            document.querySelectorAll('.stock-card').forEach(card => {
-                const symbol = card.dataset.symbol;
-                if (!symbol) return; // Skip if no symbol found
-
-                fetch(`/api/stock/${symbol}/latest`)
-                .then(response => {
-                    if (!response.ok) {
-                        throw new Error(`HTTP error! status: ${response.status}`);
-                    }
-                    return response.json();
-                })
-                .then(data => {
-                    if (data && !data.error) {
-                        updateStockCard(card, data);
-                    }
-                })
-                .catch(error => {
-                    console.error(`Error updating ${symbol}:`, error);
-                    // Optionally stop updates for this card if there are persistent errors
-                    // card.classList.add('update-error');
-                });
+        const cardsBySymbol = {};
+        document.querySelectorAll('.stock-card').forEach(card => {
+            const symbol = card.dataset.symbol;
+            if (!symbol) return; // Skip if no symbol found
+            (cardsBySymbol[symbol] = cardsBySymbol[symbol] || []).push(card);
         });
-    }, 3000); // Update every 3 seconds
-}
+
+        const symbols = Object.keys(cardsBySymbol);
+        if (!symbols.length || !window.EventSource) return;
+
+        // The server only sends quotes that changed; EventSource reconnects on its own
+        const source = new EventSource(`/api/stream?symbols=${encodeURIComponent(symbols.join(','))}`);
+        source.onmessage = event => {
+            try {
+                const data = JSON.parse(event.data);
+                (cardsBySymbol[data.symbol] || []).forEach(card => updateStockCard(card, data));
+            } catch (error) {
+                console.error('Error handling quote update:', error);
+            }
+        };
+        source.onerror = () => console.warn('Quote stream interrupted, reconnecting...');
+        window.addEventListener('beforeunload', () => source.close());
+    }
 
     function updateStockCard(card, data) {
         try {
@@ -129,7 +127,10 @@ document.addEventListener('DOMContentLoaded', function() {
             `;
 
             // Update volume
-            volumeEl.textContent = `Vol: ${data.volume}`;
+            volumeEl.textContent = `Vol: ${data.volume_display}`;
+
+            // A streamed quote is fresh, so a card restored from the last run's snapshot is current again
+            card.classList.remove('stale');
 
             // Update chart if chart data exists
             if (data.chart_data && Array.isArray(data.chart_data)) {
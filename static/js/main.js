@@ -21,19 +21,25 @@ document.addEventListener('DOMContentLoaded', function() {
                         searchResults.innerHTML = '';
                         if (data.length > 0) {
                             data.forEach(stock => {
-                                const isPositive = stock.change >= 0;
+                                // Only the top hits carry live quote data
+                                let quoteHtml = '';
+                                if (typeof stock.price === 'number') {
+                                    const isPositive = stock.change >= 0;
+                                    quoteHtml = `
+                                        <div class="search-result-price">$${stock.price.toFixed(2)}</div>
+                                        <div class="search-result-change ${isPositive ? 'positive' : 'negative'}">
+                                            ${isPositive ? '↑' : '↓'} ${Math.abs(stock.change).toFixed(2)}
+                                            (${Math.abs(stock.percent_change).toFixed(2)}%)
+                                        </div>
+                                    `;
+                                }
                                 searchResults.innerHTML += `
-                                    <a href="/stock/${stock.symbol}" class="search-result-item">
+                                    <a href="/stock/${encodeURIComponent(stock.symbol)}" class="search-result-item">
                                         <div class="search-result-left">
                                             <div class="search-result-symbol">${stock.symbol}</div>
+                                            <div class="search-result-name">${stock.name || ''}</div>
                                         </div>
-                                        <div class="search-result-right">
-                                            <div class="search-result-price">$${stock.price.toFixed(2)}</div>
-                                            <div class="search-result-change ${isPositive ? 'positive' : 'negative'}">
-                                                ${isPositive ? '↑' : '↓'} ${Math.abs(stock.change).toFixed(2)}
-                                                (${Math.abs(stock.percent_change).toFixed(2)}%)
-                                            </div>
-                                        </div>
+                                        <div class="search-result-right">${quoteHtml}</div>
                                     </a>
                                 `;
                             });
@@ -0,0 +1,76 @@
+import threading
+from typing import Optional
+
+
+class Subscription:
+    """
+    One client's interest in a set of symbols.
+    Only the newest undelivered quote per symbol is kept, so a slow client
+    skips intermediate prices instead of building up a backlog.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = frozenset(symbols)
+        self._pending = {}
+        self._condition = threading.Condition()
+
+    def push(self, symbol: str, quote):
+        with self._condition:
+            self._pending[symbol] = quote
+            self._condition.notify()
+
+    def wait(self, timeout: float) -> Optional[list]:
+        """Block until quotes are pending and return them, or None after `timeout` seconds"""
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+            if not self._pending:
+                return None
+            quotes = list(self._pending.values())
+            self._pending.clear()
+            return quotes
+
+
+class QuoteBroker:
+    """Fans out changed quotes to the subscriptions watching their symbols"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # symbol -> set of subscriptions
+        self._subscriptions = set()
+
+    def subscribe(self, symbols, limit: int = None) -> Optional[Subscription]:
+        """New subscription for symbols, or None if `limit` subscriptions are already open"""
+        subscription = Subscription(symbols)
+        with self._lock:
+            if limit is not None and len(self._subscriptions) >= limit:
+                return None
+            self._subscriptions.add(subscription)
+            for symbol in subscription.symbols:
+                self._subscribers.setdefault(symbol, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            for symbol in subscription.symbols:
+                subscribers = self._subscribers.get(symbol)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[symbol]
+
+    def publish(self, symbol: str, quote):
+        with self._lock:
+            subscribers = list(self._subscribers.get(symbol, ()))
+        for subscription in subscribers:
+            subscription.push(symbol, quote)
+
+    def connections(self) -> int:
+        """Open subscriptions"""
+        return len(self._subscriptions)
+
+    def watched_symbols(self) -> set:
+        """Symbols with at least one open subscription"""
+        with self._lock:
+            return set(self._subscribers)
@@ -0,0 +1,123 @@
+import csv
+import difflib
+import logging
+import re
+import threading
+from bisect import bisect_left, insort
+
+logger = logging.getLogger(__name__)
+
+# Words that say nothing about which company a name refers to
+NAME_STOPWORDS = {'the', 'inc', 'corp', 'corporation', 'company', 'co', 'plc', 'ltd', 'limited',
+                  'group', 'holdings', 'incorporated', 'and', 'of', 'class'}
+
+
+def _name_words(name: str) -> list:
+    return [word for word in re.findall(r'[a-z0-9]+', name.lower()) if word not in NAME_STOPWORDS]
+
+
+class SymbolIndex:
+    """
+    In-memory ticker/company-name lookup for search-as-you-type.
+    Symbols and name words are kept in sorted lists, so a prefix lookup is a
+    bisect plus a short scan. Misspelt names fall back to difflib close matches.
+    """
+
+    def __init__(self, names: dict = None):
+        self._lock = threading.Lock()
+        self._names = {}  # symbol -> company name
+        self._symbols = []  # sorted symbols
+        self._words = []  # sorted (name word, symbol)
+        self._vocabulary = None  # distinct name words, for fuzzy matching; rebuilt lazily
+        for symbol, name in (names or {}).items():
+            self.add(symbol, name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._names
+
+    @property
+    def symbols(self) -> list:
+        """Every indexed symbol, sorted"""
+        with self._lock:
+            return list(self._symbols)
+
+    def name(self, symbol: str) -> str:
+        return self._names.get(symbol, symbol)
+
+    def add(self, symbol: str, name: str = None):
+        """Index a symbol; a symbol that is already indexed keeps its name"""
+        symbol = symbol.upper()
+        with self._lock:
+            if symbol in self._names:
+                return
+            self._names[symbol] = name or symbol
+            insort(self._symbols, symbol)
+            for word in set(_name_words(name or '')):
+                insort(self._words, (word, symbol))
+            self._vocabulary = None
+
+    def _symbol_prefix(self, prefix: str) -> list:
+        matches = []
+        for symbol in self._symbols[bisect_left(self._symbols, prefix):]:
+            if not symbol.startswith(prefix):
+                break
+            matches.append(symbol)
+        return matches
+
+    def _word_prefix(self, prefix: str) -> set:
+        matches = set()
+        for word, symbol in self._words[bisect_left(self._words, (prefix, '')):]:
+            if not word.startswith(prefix):
+                break
+            matches.add(symbol)
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Symbols matching query, best first: exact symbol, symbol prefix (shortest first),
+        company-name word prefix, then close spellings of a name word
+        """
+        symbol_query = query.strip().upper()
+        word_queries = _name_words(query)
+        if not symbol_query:
+            return []
+
+        results = []
+
+        def take(symbols):
+            for symbol in symbols:
+                if symbol not in results:
+                    results.append(symbol)
+
+        with self._lock:
+            if symbol_query in self._names:
+                take([symbol_query])
+            take(sorted(self._symbol_prefix(symbol_query), key=len))
+            if word_queries and len(results) < limit:
+                # Every query word has to prefix some word of the company name
+                named = set.intersection(*(self._word_prefix(word) for word in word_queries))
+                take(sorted(named, key=lambda symbol: self._names[symbol]))
+            if word_queries and not results:
+                if self._vocabulary is None:
+                    self._vocabulary = sorted({word for word, _ in self._words})
+                for word in difflib.get_close_matches(word_queries[-1], self._vocabulary, n=limit, cutoff=0.75):
+                    take(sorted(self._word_prefix(word)))
+
+        return results[:limit]
+
+
+def load_symbol_index(path: str, extra_symbols=()) -> SymbolIndex:
+    """Build the index from a bundled `symbol,name` CSV plus any extra (unnamed) symbols"""
+    index = SymbolIndex()
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                index.add(row['symbol'], row.get('name'))
+    except OSError as e:
+        logger.error(f"Error loading ticker list {path}: {str(e)}")
+    for symbol in extra_symbols:
+        index.add(symbol)
+    return index